@@ -6,6 +6,122 @@ import math
 import sys
 #import fiducciaMattheyses.run_params as params
 import xml.etree.ElementTree as ET
+from collections import OrderedDict
+import reticle
+# SciPy is only required for sparse adjacency matrices.
+try:
+    import scipy.sparse as sparse
+except ImportError:
+    sparse = None
+
+
+# =========================================
+# Computation Cache Class
+# =========================================
+# Bounded least recently used cache for results of the layer and wafer computations.
+# Results are only cached for static layers and wafer processes since those can no longer change.
+# Keys are built by computation_key from the parameter values a result depends on rather than from the objects, so
+#  the cache does not keep layers or wafer processes, or any arrays they hold, alive.
+# The class has the following attributes:
+#   max_size: The maximum number of entries held before the least recently used entry is evicted.
+#   hits: The number of lookups that found a cached result.
+#   misses: The number of lookups that did not find a cached result.
+# =========================================
+# The class has the following methods.
+# == Get/Set ==
+#   get_max_size()
+#   set_max_size(int)
+#   get_hits()
+#   get_misses()
+#   get_size()
+# == Print ==
+#   print_description(): Dumps the cache statistics for inspection.
+# == Other ==
+#   lookup(key): Returns a tuple of whether the key was found and the cached value.
+#   store(key,value): Stores a value, evicting the least recently used entry if the cache is full.
+#   clear(): Removes all entries and resets the hit and miss counters.
+# =========================================
+
+class ComputationCache:
+    def __init__(self, max_size=65536) -> None:
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        return
+
+    # ===== Get/Set Functions =====
+
+    def get_max_size(self) -> int:
+        return self.max_size
+
+    def set_max_size(self, value) -> int:
+        if value < 0:
+            print("Error: Cache size must be non-negative.")
+            return 1
+        self.max_size = value
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return 0
+
+    def get_hits(self) -> int:
+        return self.hits
+
+    def get_misses(self) -> int:
+        return self.misses
+
+    def get_size(self) -> int:
+        return len(self.entries)
+
+    # ===== End of Get/Set Functions =====
+
+    # ===== Print Functions =====
+
+    def print_description(self) -> None:
+        print("Computation Cache: " + str(self.get_size()) + "/" + str(self.get_max_size()) + " entries"
+                + "\n\r\tHits: " + str(self.get_hits())
+                + "\n\r\tMisses: " + str(self.get_misses()))
+        return
+
+    # ===== End of Print Functions =====
+
+    # ===== Other Functions =====
+
+    def lookup(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, self.entries[key]
+        self.misses += 1
+        return False, None
+
+    def store(self, key, value) -> None:
+        if self.max_size == 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        return
+
+    # ===== End of Other Functions =====
+
+# Shared cache used by the Layer and WaferProcess computation functions.
+computation_cache = ComputationCache()
+
+# Define a function to build a computation cache key from a name and the parameter values the result depends on.
+# Returns None if any value is not a scalar, such as the arrays held by the copies used in a sweep, so the result is not cached.
+def computation_key(name, *values):
+    for value in values:
+        if not np.isscalar(value):
+            return None
+    return (name,) + values
 
 
 # =========================================
@@ -38,6 +154,9 @@ import xml.etree.ElementTree as ET
 #   set_static()
 # == Print ==
 #   print_description(): Dumps values of all the parameters for inspection.
+# == Computation ==
+#   compute_dies_per_wafer(array): Computes the number of dies that fit on the wafer for each die area in the array.
+#   get_dies_per_wafer(float): Returns the number of dies that fit on the wafer for a single die area, using the computation cache.
 # =========================================
 
 class WaferProcess:
@@ -164,6 +283,83 @@ class WaferProcess:
 
     # ===== End Print Functions =====
 
+    # ===== Computation Functions =====
+
+    def compute_dies_per_wafer(self, square_areas) -> np.ndarray:
+        return dies_per_wafer(square_areas, self.wafer_diameter, self.edge_exclusion, self.dicing_distance)
+
+    def get_dies_per_wafer(self, square_area) -> int:
+        key = computation_key("dies_per_wafer", self.wafer_diameter, self.edge_exclusion, self.dicing_distance, square_area)
+        cacheable = self.static and key != None
+        if cacheable:
+            found, num_dies = computation_cache.lookup(key)
+            if found:
+                return num_dies
+        num_dies = int(self.compute_dies_per_wafer(np.array([square_area], dtype=float))[0])
+        if cacheable:
+            computation_cache.store(key, num_dies)
+        return num_dies
+
+    # ===== End of Computation Functions =====
+
+
+# =========================================
+# Dies Per Wafer Kernel
+# =========================================
+# Computes the number of square dies that fit on a wafer for an array of die areas in a single vectorized pass.
+# I approximate this by assuming there are two possibilities for the best way to pack squares in the circle.
+#  1. The squares are centered on the diameter line of the circle.
+#  2. The squares are above and below the diameter line of the circle.
+# Each row of squares sits at a height that is a multiple of the square side from the diameter line, so all rows
+#  for all dies are evaluated at once on a (dies x rows) grid. Rows above the usable radius contribute nothing.
+# The dies are processed in chunks of similar size to bound the size of the grid for very large batches.
+#   square_areas: Array of die areas in mm^2.
+#   wafer_diameter: The diameter of the wafer in mm.
+#   edge_exclusion: The edge exclusion of the wafer in mm.
+#   dicing_distance: The space between dies lost to dicing in mm.
+# Returns an integer array of the same shape as square_areas.
+# =========================================
+
+dies_per_wafer_grid_size = 1 << 20
+
+def dies_per_wafer(square_areas, wafer_diameter, edge_exclusion, dicing_distance) -> np.ndarray:
+    square_areas = np.asarray(square_areas, dtype=float)
+    num_squares = np.zeros(square_areas.shape, dtype=np.int64)
+    if square_areas.size == 0:
+        return num_squares
+
+    usable_wafer_radius = (wafer_diameter - 2*edge_exclusion)/2
+    square_sides = (np.sqrt(square_areas) + dicing_distance).ravel()
+    # Sort by side length so each chunk only walks as many rows as its smallest die needs.
+    order = np.argsort(square_sides, kind="stable")
+    sorted_sides = square_sides[order]
+    sorted_num_squares = np.zeros(sorted_sides.shape, dtype=np.int64)
+
+    start = 0
+    while start < sorted_sides.size:
+        # Enough rows to reach the edge of the wafer for the smallest die in the chunk.
+        max_rows = int(math.ceil(usable_wafer_radius/sorted_sides[start])) + 1
+        end = start + max(1, dies_per_wafer_grid_size//max_rows)
+        square_side = sorted_sides[start:end, np.newaxis]
+        rows = np.arange(max_rows, dtype=float)
+        # Compute the length of a chord that intersects the circle at each row height.
+        # Rows outside of the circle are clipped to a chord length of zero so they do not add any squares.
+        # Case 1 counts the row on the diameter line once and every other row twice (above and below).
+        row_chord_height = square_side*(rows + 0.5)
+        chord_length = np.sqrt(np.maximum(usable_wafer_radius**2 - row_chord_height**2, 0.0))
+        row_squares = np.floor(chord_length/square_side).astype(np.int64)
+        num_squares_case_1 = 2*row_squares.sum(axis=1) - row_squares[:, 0]
+        # Case 2 has no row on the diameter line, so every row is counted twice.
+        row_chord_height = square_side*(rows + 1.0)
+        chord_length = np.sqrt(np.maximum(usable_wafer_radius**2 - row_chord_height**2, 0.0))
+        num_squares_case_2 = 2*np.floor(chord_length/square_side).astype(np.int64).sum(axis=1)
+        # Find the maximum of the two cases.
+        sorted_num_squares[start:end] = np.maximum(num_squares_case_1, num_squares_case_2)
+        start = end
+
+    num_squares.reshape(-1)[order] = sorted_num_squares
+    return num_squares
+
 
 # =========================================
 # IO Class
@@ -400,9 +596,12 @@ class IO:
 # == Print ==
 #   print_description(): Dumps values of all the parameters for inspection.
 # == Computation ==
-#   layerYield(float): Computes the yield of the layer given the area of the layer.
+#   layerYield(float,int): Computes the yield of the layer given the area of the layer and the number of reticle stitches.
 #   reticleUtilization(float,float,float): Computes the reticle utilization given the area of the layer, the reticle x dimension, and the reticle y dimension.
-#   layerCost(float,float,float): Computes the cost of the layer given the area of the layer, the reticle x dimension, and the reticle y dimension.
+#   layerCost(float,WaferProcess): Computes the cost of the layer given the area of the layer and the wafer process.
+#   layerCostBatch(array,WaferProcess): Computes the cost of the layer for an array of layer areas.
+#   compute_cost_per_mm2(float,WaferProcess): Computes the cost per mm^2 of the layer accounting for wafer utilization.
+#   compute_cost_per_mm2_batch(array,WaferProcess): Computes the number of dies per wafer and cost per mm^2 for an array of die areas.
 # =========================================
 
 class Layer:
@@ -552,91 +751,187 @@ class Layer:
 
     # ========== Computation Functions =========
 
-    def layerYield(self,area) -> float:
-        num_stitches = 0
+    def layerYield(self,area,num_stitches=0) -> float:
         defect_yield = (1+(self.defect_density*area*self.critical_area_ratio)/self.clustering_factor)**(-1*self.clustering_factor)
         stitching_yield = self.stitching_yield**num_stitches
         final_layer_yield = stitching_yield*defect_yield
         return final_layer_yield
 
     def reticleUtilization(self,area,reticle_x,reticle_y) -> float:
-        reticle_area = reticle_x*reticle_y
-        # If the area is larger than the reticle area, this requires stitching. To get the reticle utilization,
-        #  increase the reticle area to the lowest multiple of the reticle area that will fit the stitched chip.
-        while reticle_area < area:
-            reticle_area += reticle_x*reticle_y
-        number_chips_in_reticle = reticle_area//area
-        unutilized_reticle = (reticle_area) - number_chips_in_reticle*area
-        reticle_utilization = (reticle_area - unutilized_reticle)/(reticle_area)
+        # The reticle utilization does not depend on any layer parameters, so the result is shared by all layers.
+        key = ("reticleUtilization", area, reticle_x, reticle_y)
+        found, reticle_utilization = computation_cache.lookup(key)
+        if found:
+            return reticle_utilization
+        reticle_utilization = float(reticle.computeReticleUtilization(area,reticle_x,reticle_y))
+        computation_cache.store(key, reticle_utilization)
         return reticle_utilization
         
     def layerCost(self,area,wafer_process) -> float:
-        wafer_diameter = wafer_process.get_wafer_diameter()
-        edge_exclusion = wafer_process.get_edge_exclusion()
+        key = computation_key("layerCost", self.cost_per_mm2, self.litho_percent, wafer_process.get_wafer_diameter(), wafer_process.get_edge_exclusion(), wafer_process.get_dicing_distance(), wafer_process.get_reticle_x(), wafer_process.get_reticle_y(), area)
+        cacheable = self.static and wafer_process.get_static() and key != None
+        if cacheable:
+            found, layer_cost = computation_cache.lookup(key)
+            if found:
+                return layer_cost
+        num_dies = np.array([wafer_process.get_dies_per_wafer(area)])
+        layer_cost = float(self.layerCostBatch(np.array([area], dtype=float),wafer_process,num_dies)[0])
+        if cacheable:
+            computation_cache.store(key, layer_cost)
+        return layer_cost
+
+    # The num_dies argument allows a caller that has already computed the dies per wafer for these areas to skip the packing computation.
+    def layerCostBatch(self,areas,wafer_process,num_dies=None) -> np.ndarray:
+        areas = np.asarray(areas, dtype=float)
         reticle_x = wafer_process.get_reticle_x()
         reticle_y = wafer_process.get_reticle_y()
         # TODO: Replace cost_per_mm2 with a function that takes the litho cost and reticle size into account.
-        layer_cost = area*self.compute_cost_per_mm2(area,wafer_process)
+        num_dies, cost_per_mm2 = self.compute_cost_per_mm2_batch(areas,wafer_process,num_dies)
+        layer_cost = areas*cost_per_mm2
         # Edge case to avoid division by zero.
         if (self.litho_percent == 0.0):
             reticle_utilization = 1.0
         else:
-            reticle_utilization = self.reticleUtilization(area,reticle_x,reticle_y)
-        
+            reticle_utilization = reticle.computeReticleUtilization(areas,reticle_x,reticle_y)
+
         layer_cost = layer_cost*(1-self.litho_percent) + (layer_cost*self.litho_percent)/reticle_utilization
         return layer_cost
 
     def compute_cost_per_mm2(self, square_area, wafer_process) -> float:
+        key = computation_key("compute_cost_per_mm2", self.cost_per_mm2, wafer_process.get_wafer_diameter(), wafer_process.get_edge_exclusion(), wafer_process.get_dicing_distance(), square_area)
+        cacheable = self.static and wafer_process.get_static() and key != None
+        if cacheable:
+            found, cost_per_mm2 = computation_cache.lookup(key)
+            if found:
+                return cost_per_mm2
+        num_squares = np.array([wafer_process.get_dies_per_wafer(square_area)])
+        num_squares, cost_per_mm2 = self.compute_cost_per_mm2_batch(np.array([square_area], dtype=float), wafer_process, num_squares)
+        cost_per_mm2 = float(cost_per_mm2[0])
+        if cacheable:
+            computation_cache.store(key, cost_per_mm2)
+        return cost_per_mm2
+
+    def compute_cost_per_mm2_batch(self, square_areas, wafer_process, num_squares=None):
+        square_areas = np.asarray(square_areas, dtype=float)
         wafer_diameter = wafer_process.get_wafer_diameter()
-        edge_exclusion = wafer_process.get_edge_exclusion()
-        dicing_distance = wafer_process.get_dicing_distance()
-        # Compute the number of squares that fit in the circular wafer.
-        usable_wafer_diameter = wafer_diameter - 2*edge_exclusion
-        square_side = math.sqrt(square_area) + dicing_distance
-
-        # I approximate this by assuming there are two possibilities for the best way to pack squares in the circle.
-        #  1. The squares are centered on the diameter line of the circle.
-        #  2. The squares are above and below the diameter line of the circle.
-
-        # Case 1
-        num_squares_case_1 = 0
-        # Compute the length of a chord that intersects the circle half the square's side length away from the center of the circle.
-        row_chord_height = square_side/2
-        chord_length = math.sqrt((usable_wafer_diameter/2)**2 - (row_chord_height)**2)
-        # Compute the number of squares that fit along the chord length.
-        num_squares_case_1 += math.floor(chord_length/square_side)
-        row_chord_height += square_side
-        while row_chord_height < usable_wafer_diameter/2:
-            # Compute the length of a chord that intersects the circle half the square's side length away from the center of the circle.
-            chord_length = math.sqrt((usable_wafer_diameter/2)**2 - (row_chord_height)**2)
-            num_squares_case_1 += 2*math.floor(chord_length/square_side)
-            row_chord_height += square_side
-
-        # Case 2
-        num_squares_case_2 = 0
-        # Compute the length of a chord that intersects the circle the square's side length away from the center of the circle.
-        row_chord_height = square_side
-        chord_length = math.sqrt((usable_wafer_diameter/2)**2 - (row_chord_height)**2)
-        num_squares_case_2 += 2*math.floor(chord_length/square_side)
-        row_chord_height += square_side
-        while row_chord_height < usable_wafer_diameter/2:
-            # Compute the length of a chord that intersects the circle half the square's side length away from the center of the circle.
-            chord_length = math.sqrt((usable_wafer_diameter/2)**2 - (row_chord_height)**2)
-            num_squares_case_2 += 2*math.floor(chord_length/square_side)
-            row_chord_height += square_side
-        
-        # Find the maximum of the two cases.
-        num_squares = max(num_squares_case_1, num_squares_case_2)
+        if num_squares is None:
+            num_squares = wafer_process.compute_dies_per_wafer(square_areas)
 
         # Compute the cost per mm^2.
-        used_area = num_squares*square_area
+        used_area = num_squares*square_areas
         circle_area = math.pi*(wafer_diameter/2)**2
         cost_per_mm2 = self.cost_per_mm2*circle_area/used_area
-        return cost_per_mm2
+        return num_squares, cost_per_mm2
 
     # ===== End of Computation Functions =======
 
 
+# =========================================
+# Stackup Class
+# =========================================
+# Array-backed form of a list of layers. The stackup is compiled once into one array per layer parameter so
+#  the yield product, layer cost sum, and mask cost sum are each evaluated as a single vector expression.
+# The layers should be static so the compiled arrays remain valid. A stackup built for a single evaluation, such as
+#  the stackups of the copies in sweep.py, may skip this check with check_static.
+# The class has the following attributes:
+#   layers: The list of Layer objects in the stackup from bottom to top.
+#   defect_density: Array of layer defect densities.
+#   critical_area_ratio: Array of layer critical area ratios.
+#   clustering_factor: Array of layer clustering factors.
+#   cost_per_mm2: Array of layer costs per mm^2.
+#   litho_percent: Array of layer litho percents.
+#   mask_cost: Array of layer mask costs.
+#   stitching_yield: Array of layer stitching yields.
+# Each array has the layers on its last axis.
+# =========================================
+# The class has the following methods.
+# == Get/Set ==
+#   get_layers()
+#   get_layer_names()
+#   get_num_layers()
+# == Computation ==
+#   stackupYield(float,int): Computes the product of the layer yields given the area of the layers and the number of stitches. The area and number
+#    of stitches may be arrays.
+#   stackupCost(float,WaferProcess): Computes the sum of the layer costs given the area of the layers and the wafer process.
+#   stackupMaskCost(): Computes the sum of the layer mask costs.
+# == Other ==
+#   layerArray(list): Stacks a parameter of every layer into an array with the layers on the last axis.
+# =========================================
+
+class Stackup:
+    def __init__(self, layers=[], check_static=True) -> None:
+        self.layers = list(layers)
+        for layer in self.layers:
+            if check_static and not layer.get_static():
+                print("Warning: Layer " + str(layer.get_name()) + " is not static. Stackup arrays may not reflect later changes.")
+        self.defect_density = self.layerArray([layer.get_defect_density() for layer in self.layers])
+        self.critical_area_ratio = self.layerArray([layer.get_critical_area_ratio() for layer in self.layers])
+        self.clustering_factor = self.layerArray([layer.get_clustering_factor() for layer in self.layers])
+        self.cost_per_mm2 = self.layerArray([layer.get_cost_per_mm2() for layer in self.layers])
+        self.litho_percent = self.layerArray([layer.get_litho_percent() for layer in self.layers])
+        self.mask_cost = self.layerArray([layer.get_mask_cost() for layer in self.layers])
+        self.stitching_yield = self.layerArray([layer.get_stitching_yield() for layer in self.layers])
+        return
+
+    # Stack a parameter of every layer into an array with the layers on the last axis.
+    # Layer parameters may themselves be arrays of values, for example in a parameter sweep, in which case they are broadcast against each other.
+    def layerArray(self, values):
+        if len(values) == 0:
+            return np.zeros(0)
+        return np.stack(np.broadcast_arrays(*[np.asarray(value, dtype=float) for value in values]), axis=-1)
+
+    # ===== Get/Set Functions =====
+
+    def get_layers(self) -> list:
+        return self.layers
+
+    def get_layer_names(self) -> list:
+        return [layer.get_name() for layer in self.layers]
+
+    def get_num_layers(self) -> int:
+        return len(self.layers)
+
+    # ===== End of Get/Set Functions =====
+
+    # ===== Computation Functions =====
+
+    # Vectorized form of Layer.layerYield over all layers in the stackup.
+    def stackupYield(self, area, num_stitches=0) -> float:
+        area = np.asarray(area, dtype=float)[..., np.newaxis]
+        num_stitches = np.asarray(num_stitches)[..., np.newaxis]
+        defect_yield = (1+(self.defect_density*area*self.critical_area_ratio)/self.clustering_factor)**(-1*self.clustering_factor)
+        stitching_yield = self.stitching_yield**num_stitches
+        return np.prod(stitching_yield*defect_yield, axis=-1)
+
+    # Vectorized form of Layer.layerCost over all layers in the stackup.
+    # The area may also be an array of areas, in which case an array of stackup costs is returned.
+    def stackupCost(self, area, wafer_process):
+        areas = np.asarray(area, dtype=float)
+        if areas.ndim == 0:
+            num_dies = np.array(wafer_process.get_dies_per_wafer(float(areas)))
+        else:
+            num_dies = wafer_process.compute_dies_per_wafer(areas)
+        areas = areas[..., np.newaxis]
+        used_area = num_dies[..., np.newaxis]*areas
+        circle_area = math.pi*(wafer_process.get_wafer_diameter()/2)**2
+        layer_cost = areas*(self.cost_per_mm2*circle_area/used_area)
+        # Layers that do not spend time on the lithography tool do not depend on reticle utilization.
+        if np.any(self.litho_percent != 0.0):
+            reticle_x = wafer_process.get_reticle_x()
+            reticle_y = wafer_process.get_reticle_y()
+            reticle_utilization = reticle.computeReticleUtilization(areas,reticle_x,reticle_y)
+            reticle_utilization = np.where(self.litho_percent == 0.0, 1.0, reticle_utilization)
+        else:
+            reticle_utilization = 1.0
+        layer_cost = layer_cost*(1-self.litho_percent) + (layer_cost*self.litho_percent)/reticle_utilization
+        return np.sum(layer_cost, axis=-1)
+
+    def stackupMaskCost(self) -> float:
+        return np.sum(self.mask_cost, axis=-1)
+
+    # ===== End of Computation Functions =====
+
+
 # =========================================
 # Assembly Definition Class
 # =========================================
@@ -1140,7 +1435,7 @@ class Assembly:
             return 0
 
     def get_picknplace_cost_per_second(self) -> float:
-        if self.picknplace_cost_per_second == None:
+        if self.picknplace_cost_per_second is None:
             self.compute_picknplace_cost_per_second()
         return self.picknplace_cost_per_second
     
@@ -1149,7 +1444,7 @@ class Assembly:
         return 0
 
     def get_bonding_cost_per_second(self) -> float:
-        if self.bonding_cost_per_second == None:
+        if self.bonding_cost_per_second is None:
             self.compute_bonding_cost_per_second()
         return self.bonding_cost_per_second
     
@@ -1417,20 +1712,318 @@ class Test:
 
     # ===== End of Other Functions =====
 
+# =========================================
+# Netlist Class
+# =========================================
+# Tensor form of the global adjacency matrices. The matrices for all IO types are compiled once into a single
+#  (types x blocks x blocks) tensor, or a sparse equivalent, with the IO parameters stored in vectors aligned with
+#  the IO type axis. IO area, signal count, and signal power for a block are then contractions over the IO type axis.
+# The IO definitions should be static so the compiled vectors remain valid.
+# The class has the following attributes:
+#   io_types: The list of IO types in the same order as the first axis of the tensor.
+#   block_names: The names of the blocks in the adjacency matrices.
+#   block_index: Dictionary from block name to index in the adjacency matrices.
+#   sparse: A boolean set true when the tensor is stored as SciPy sparse matrices.
+#   adjacency: Dense (types x blocks x blocks) array, or a sparse (types*blocks x blocks) matrix with the matrices for each IO type stacked vertically.
+#   adjacency_transpose: For a sparse netlist, the transposed matrices stacked in the same way so columns are read as rows. None for a dense netlist.
+#   row_sums: (types x blocks) array of the row sums of the adjacency matrix of each IO type.
+#   column_sums: (types x blocks) array of the column sums of the adjacency matrix of each IO type.
+#   tx_area: Array of TX areas of each IO type.
+#   rx_area: Array of RX areas of each IO type.
+#   wire_count: Array of wire counts of each IO type.
+#   reach: Array of reaches of each IO type.
+#   signal_energy: Array of bandwidth*energy_per_bit of each IO type.
+#   bidirectional_factor: Array set to 0.5 for bidirectional IO types and 1.0 otherwise.
+#   reach_values: Sorted array of the distinct reaches of the IO types.
+#   reach_classes: Array of the index into reach_values of the reach of each IO type.
+#   io_areas: Array of the IO area of every block.
+#   signal_powers: Array of the signal power of every block.
+#   boundary_signal_counts: (types x blocks) array of the number of signals of each IO type leaving every block, skipping connections of a block to itself.
+#   boundary_reach_counts: (reaches x blocks) array of boundary_signal_counts summed by reach class.
+# =========================================
+# The class has the following methods.
+# == Get/Set ==
+#   get_io_types()
+#   get_num_io_types()
+#   get_block_names()
+#   get_num_blocks()
+#   get_block_index(string): Returns the index of the named block or None if the block is not in the netlist.
+#   get_sparse()
+#   get_arrays(): Returns a dictionary of the IO types, block names, and the arrays the netlist is built from.
+#   set_arrays(dict): Rebuilds the netlist from a dictionary returned by get_arrays without copying the arrays.
+#   get_io_area(int): Returns the TX and RX area of the IOs of a block.
+#   get_signal_power(int): Returns the signal power of a block.
+#   get_boundary_signal_counts(int): Returns the number of signals of each IO type leaving a block, skipping connections of the block to itself.
+#   get_boundary_reach_counts(int): Returns the number of signals of each reach class leaving a block, skipping connections of the block to itself.
+#   get_reach_values()
+# == Computation ==
+#   computeBlockMetrics(): Computes the IO area, signal power, and boundary signal counts of all blocks in one pass.
+#   compute_signal_counts(int,list): Computes the number of signals of each IO type leaving a block, skipping connections to the excluded blocks.
+#   compute_reach_counts(array): Sums signal counts of each IO type into a histogram over the reach classes.
+# =========================================
+
+class Netlist:
+    def __init__(self, adjacency_matrix_definitions={}, ios=[], block_names=[]) -> None:
+        self.io_types = list(adjacency_matrix_definitions.keys())
+        self.block_names = block_names
+        self.block_index = {}
+        for i in range(len(block_names)):
+            self.block_index[block_names[i]] = i
+
+        # The first IO definition with a matching type is used for each IO type.
+        io_definitions = []
+        for io_type in self.io_types:
+            io_definition = None
+            for io in ios:
+                if io.get_type() == io_type:
+                    io_definition = io
+                    break
+            if io_definition == None:
+                print("Error: IO type " + str(io_type) + " in the adjacency matrices is not defined. Exiting...")
+                sys.exit(1)
+            if not io_definition.get_static():
+                print("Warning: IO type " + str(io_type) + " is not static. Netlist arrays may not reflect later changes.")
+            io_definitions.append(io_definition)
+        self.tx_area = np.array([io.get_tx_area() for io in io_definitions], dtype=float)
+        self.rx_area = np.array([io.get_rx_area() for io in io_definitions], dtype=float)
+        self.wire_count = np.array([io.get_wire_count() for io in io_definitions], dtype=float)
+        self.reach = np.array([io.get_reach() for io in io_definitions], dtype=float)
+        self.signal_energy = np.array([io.get_bandwidth()*io.get_energy_per_bit() for io in io_definitions], dtype=float)
+        self.bidirectional_factor = np.array([0.5 if io.get_bidirectional() else 1.0 for io in io_definitions], dtype=float)
+        self.reach_values, self.reach_classes = np.unique(self.reach, return_inverse=True)
+
+        num_types = len(self.io_types)
+        num_blocks = len(block_names)
+        matrices = [adjacency_matrix_definitions[io_type] for io_type in self.io_types]
+        self.sparse = sparse is not None and any(sparse.issparse(matrix) for matrix in matrices)
+        if self.sparse:
+            self.adjacency = sparse.vstack([sparse.csr_matrix(matrix) for matrix in matrices], format="csr")
+            self.adjacency_transpose = sparse.vstack([sparse.csr_matrix(matrix).T for matrix in matrices], format="csr")
+            self.row_sums = np.asarray(self.adjacency.sum(axis=1)).reshape(num_types, num_blocks)
+            self.column_sums = np.asarray(self.adjacency_transpose.sum(axis=1)).reshape(num_types, num_blocks)
+        else:
+            # The matrices are copied into a preallocated tensor one at a time, so the definitions can be released once
+            #  the netlist is built and the adjacency is only held once.
+            dtype = np.result_type(*[np.asarray(matrix).dtype for matrix in matrices]) if num_types > 0 else float
+            self.adjacency = np.empty((num_types, num_blocks, num_blocks), dtype=dtype)
+            for i in range(num_types):
+                self.adjacency[i] = matrices[i]
+            self.adjacency_transpose = None
+            self.row_sums = np.sum(self.adjacency, axis=2)
+            self.column_sums = np.sum(self.adjacency, axis=1)
+        self.computeBlockMetrics()
+        return
+
+    # ===== Get/Set Functions =====
+
+    def get_io_types(self) -> list:
+        return self.io_types
+
+    def get_num_io_types(self) -> int:
+        return len(self.io_types)
+
+    def get_block_names(self) -> list:
+        return self.block_names
+
+    def get_num_blocks(self) -> int:
+        return len(self.block_names)
+
+    def get_block_index(self, name):
+        return self.block_index.get(name)
+
+    def get_sparse(self) -> bool:
+        return self.sparse
+
+    # The arrays are returned without copying. A sparse adjacency tensor is returned as its CSR components.
+    def get_arrays(self) -> dict:
+        arrays = {
+            "io_types": self.io_types,
+            "block_names": self.block_names,
+            "sparse": self.sparse,
+            "tx_area": self.tx_area,
+            "rx_area": self.rx_area,
+            "wire_count": self.wire_count,
+            "reach": self.reach,
+            "signal_energy": self.signal_energy,
+            "bidirectional_factor": self.bidirectional_factor,
+            "row_sums": self.row_sums,
+            "column_sums": self.column_sums
+        }
+        if self.sparse:
+            for name, matrix in [("adjacency", self.adjacency), ("adjacency_transpose", self.adjacency_transpose)]:
+                arrays[name + "_data"] = matrix.data
+                arrays[name + "_indices"] = matrix.indices
+                arrays[name + "_indptr"] = matrix.indptr
+        else:
+            arrays["adjacency"] = self.adjacency
+        return arrays
+
+    # The arrays are used as given, so read-only views such as arrays in shared memory can back the netlist.
+    def set_arrays(self, arrays) -> int:
+        self.io_types = list(arrays["io_types"])
+        self.block_names = arrays["block_names"]
+        self.block_index = {}
+        for i in range(len(self.block_names)):
+            self.block_index[self.block_names[i]] = i
+        self.sparse = arrays["sparse"]
+        if self.sparse and sparse is None:
+            print("Error: Sparse netlist requires scipy.")
+            return 1
+        self.tx_area = arrays["tx_area"]
+        self.rx_area = arrays["rx_area"]
+        self.wire_count = arrays["wire_count"]
+        self.reach = arrays["reach"]
+        self.signal_energy = arrays["signal_energy"]
+        self.bidirectional_factor = arrays["bidirectional_factor"]
+        self.reach_values, self.reach_classes = np.unique(self.reach, return_inverse=True)
+        self.row_sums = arrays["row_sums"]
+        self.column_sums = arrays["column_sums"]
+        if self.sparse:
+            shape = (len(self.io_types)*len(self.block_names), len(self.block_names))
+            self.adjacency = sparse.csr_matrix((arrays["adjacency_data"], arrays["adjacency_indices"], arrays["adjacency_indptr"]), shape=shape, copy=False)
+            self.adjacency_transpose = sparse.csr_matrix((arrays["adjacency_transpose_data"], arrays["adjacency_transpose_indices"], arrays["adjacency_transpose_indptr"]), shape=shape, copy=False)
+        else:
+            self.adjacency = arrays["adjacency"]
+            self.adjacency_transpose = None
+        self.computeBlockMetrics()
+        return 0
+
+    def get_io_area(self, index) -> float:
+        return self.io_areas[index]
+
+    def get_signal_power(self, index) -> float:
+        return self.signal_powers[index]
+
+    def get_boundary_signal_counts(self, index):
+        return self.boundary_signal_counts[:, index]
+
+    def get_boundary_reach_counts(self, index):
+        return self.boundary_reach_counts[:, index]
+
+    def get_reach_values(self):
+        return self.reach_values
+
+    # ===== End of Get/Set Functions =====
+
+    # ===== Computation Functions =====
+
+    # Sum the entries of the row and column of a block over the excluded blocks for each IO type.
+    def excludedSums(self, index, excluded):
+        if len(excluded) == 0:
+            return np.zeros(len(self.io_types)), np.zeros(len(self.io_types))
+        if self.sparse:
+            rows = np.arange(len(self.io_types))*len(self.block_names) + index
+            row_excluded = np.asarray(self.adjacency[rows][:, excluded].sum(axis=1)).ravel()
+            column_excluded = np.asarray(self.adjacency_transpose[rows][:, excluded].sum(axis=1)).ravel()
+        else:
+            row_excluded = np.sum(self.adjacency[:, index, excluded], axis=1)
+            column_excluded = np.sum(self.adjacency[:, excluded, index], axis=1)
+        return row_excluded, column_excluded
+
+    # Compute the per block values that do not depend on the chip hierarchy for every block at once.
+    # The row sum is used for both the TX and RX area and is counted twice for the signal power.
+    def computeBlockMetrics(self) -> None:
+        num_types = len(self.io_types)
+        num_blocks = len(self.block_names)
+        if self.sparse:
+            diagonal = np.zeros((num_types, num_blocks))
+            for i in range(num_types):
+                diagonal[i] = self.adjacency[i*num_blocks:(i+1)*num_blocks].diagonal()
+        else:
+            diagonal = self.adjacency[:, np.arange(num_blocks), np.arange(num_blocks)]
+        tx_area = self.tx_area[:, np.newaxis]
+        rx_area = self.rx_area[:, np.newaxis]
+        wire_count = self.wire_count[:, np.newaxis]
+        signal_energy = self.signal_energy[:, np.newaxis]
+        bidirectional_factor = self.bidirectional_factor[:, np.newaxis]
+        self.io_areas = np.sum(self.row_sums*tx_area + self.row_sums*rx_area, axis=0)
+        self.signal_powers = np.sum((self.row_sums + self.row_sums)*signal_energy*bidirectional_factor, axis=0)
+        self.boundary_signal_counts = ((self.row_sums - diagonal) + (self.column_sums - diagonal))*wire_count*bidirectional_factor
+        self.boundary_reach_counts = np.zeros((len(self.reach_values), num_blocks))
+        for i in range(num_types):
+            self.boundary_reach_counts[self.reach_classes[i]] += self.boundary_signal_counts[i]
+        return
+
+    def compute_signal_counts(self, index, excluded=[]):
+        row_excluded, column_excluded = self.excludedSums(index, excluded)
+        row_sums = self.row_sums[:, index] - row_excluded
+        column_sums = self.column_sums[:, index] - column_excluded
+        return (row_sums + column_sums)*self.wire_count*self.bidirectional_factor
+
+    def compute_reach_counts(self, io_type_signals):
+        return np.bincount(self.reach_classes, weights=io_type_signals, minlength=len(self.reach_values))
+
+    # ===== End of Computation Functions =====
+
+
+# =========================================
+# Pad Area Kernel
+# =========================================
+# Computes the area of the grid of pads on the bottom of a chip from a histogram of signal counts by reach.
+# The reaches are visited from smallest to largest. For each reach, the side of the pad grid is grown until the pads
+#  of all signals with that reach or shorter fit within the reach of the edge of the chip, with the die separation
+#  subtracted from the reach. The side is rounded up to a multiple of the bonding pitch.
+# The histograms, bonding pitches, and die separations broadcast against each other, so the pad area of many chips
+#  or of one chip at many bonding pitches is computed in a single call.
+#   reach_values: Array of reaches in mm, one per reach class.
+#   reach_counts: Array of signal counts with the reach classes on the last axis.
+#   bonding_pitch: Bonding pitch in mm or array of bonding pitches.
+#   die_separation: Die separation in mm or array of die separations.
+# Returns an array of pad areas in mm^2 with the broadcast shape of the inputs.
+# =========================================
+
+def pad_area(reach_values, reach_counts, bonding_pitch, die_separation) -> np.ndarray:
+    reach_values = np.asarray(reach_values, dtype=float)
+    reach_counts = np.asarray(reach_counts, dtype=float)
+    bonding_pitch = np.asarray(bonding_pitch, dtype=float)
+    die_separation = np.asarray(die_separation, dtype=float)
+    shape = np.broadcast_shapes(reach_counts.shape[:-1], bonding_pitch.shape, die_separation.shape)
+
+    area_per_pad = bonding_pitch**2
+    current_side = np.zeros(shape)
+    current_count = np.zeros(shape)
+    for reach_class in np.argsort(reach_values, kind="stable"):
+        reach_with_separation = reach_values[reach_class] - die_separation
+        if np.any(reach_with_separation < 0):
+            print("Error: Reach is smaller than chip separation. Exiting...")
+            sys.exit(1)
+        current_count = current_count + reach_counts[..., reach_class]
+        # Find the minimum boundary that would contain all the pads with the current reach.
+        required_area = current_count*area_per_pad
+        usable_area = np.where(reach_with_separation < current_side, reach_with_separation**2 + 2*reach_with_separation*current_side, current_side**2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            new_req_side = np.where(np.sqrt(required_area) > reach_with_separation, (required_area - reach_with_separation**2)/(2*reach_with_separation), np.sqrt(required_area))
+        # Round up to the nearest multiple of bonding pitch.
+        new_req_side = np.ceil(new_req_side/bonding_pitch)*bonding_pitch
+        current_side = np.where((usable_area <= required_area) & (new_req_side > current_side), new_req_side, current_side)
+    grid_side = np.ceil(current_side/bonding_pitch)
+
+    return grid_side*grid_side*area_per_pad
+
+
 # =========================================
 # Chip Class
 # =========================================
 # The class has attributes:
 #   name: The name of the chip.
 #   coreArea: The area of the core in mm^2.
-#   cost: The cost of the chip in dollars.
-#   chip_yield: The yield of the chip.
+#   cost: The cost of the chip in dollars. Computed on first access.
+#   chip_yield: The yield of the chip. Computed on first access.
+#   area: The area of the chip in mm^2. Computed on first access.
 #   quality: The quality of the chip.
 #   assemblyProcess: The assembly process used to assemble the chip.
 #   stackup: The stackup of the chip.
+#   stackupArrays: The stackup compiled into a Stackup object for vectorized yield and cost evaluation.
 #   chips: The list of chips that are stacked in this chip.
 #   adjacencyMatrixList: The list of adjacency matrices for the chip.
+#   blockNames: The names of the blocks in the global adjacency matrices.
+#   netlist: The global adjacency matrices compiled into a Netlist. Shared by all chips in the design. The chip does not keep the
+#    adjacency matrix definitions, so the caller can release them once the chip is built.
 #   power: The power of the chip in Watts.
+#   signal_count: The number of signals leaving the chip. Computed on first access.
+#   signal_with_reach_count: Histogram of signal_count over the reach classes of the netlist. Computed on first access.
+#   chips_signal_count: The number of signals leaving the chips stacked on this chip. Computed on first access.
+#   parent: The chip this chip is stacked on, or None for the root chip.
 #   static: A boolean set true when the chip is defined to prevent further changes.
 # =========================================
 # The class has the following methods.
@@ -1449,6 +2042,10 @@ class Test:
 #   set_assemblyProcess(Assembly)
 #   get_stackup()
 #   set_stackup(list)
+#   get_stackupArrays()
+#   get_waferProcess()
+#   set_waferProcess(WaferProcess)
+#   get_netlist()
 #   get_chips()
 #   set_chips(list)
 #   get_adjacencyMatrixList()
@@ -1463,13 +2060,19 @@ class Test:
 #   computeArea(): Computes the area of the chip in mm^2.
 #   computeCost(): Computes the cost of the chip in dollars.
 #   computeChipYield(): Computes the yield of the chip.
+#   markDirty(): Clears the computed parameters of the chip and its ancestors after a parameter changes.
+#   computeSignalCounts(): Computes the signal counts of the chip and all stacked chips in one post-order traversal.
+#   get_chip_signal_count(): Returns the number of signals leaving the chip and the histogram over reach classes.
+#   computeNumberReticles(float): Computes the number of reticles and reticle stitches for a die of the given area.
+#   get_block_index(): Returns the index of the chip in the global adjacency matrices.
+#   get_internal_block_indices(list): Returns the indices of the blocks named in an internal block list.
 # =========================================
 
 class Chip:
 
     # ===== Initialization Functions =====
 
-    def __init__(self, filename="", dict = {}, waferProcessList=[], assemblyProcessList=[], testProcessList=[], layers=[], ios=[], adjacency_matrix_definitions={}, block_names=[], static=False) -> None:
+    def __init__(self, filename="", dict = {}, waferProcessList=[], assemblyProcessList=[], testProcessList=[], layers=[], ios=[], adjacency_matrix_definitions={}, block_names=[], static=False, netlist=None) -> None:
         root = {}
         if filename != "" and dict == {}:
             tree = ET.parse(filename)
@@ -1482,10 +2085,28 @@ class Chip:
 
         attributes = root.attrib
 
+        # Area, cost, yield, and stack power are computed lazily on first access through getArea, get_cost, get_chip_yield, and get_stack_power.
+        # A value of None marks the value as dirty.
+        self.area = None
+        self.cost = None
+        self.chip_yield = None
+        self.stack_power = None
+        self.parent = None
+        # Signal counts are computed for the whole subtree in one traversal through computeSignalCounts.
+        self.signal_count = None
+        self.signal_with_reach_count = None
+        self.chips_signal_count = None
+
+        # The netlist is compiled once for the root chip and shared with all of the stacked chips.
+        if netlist == None:
+            netlist = Netlist(adjacency_matrix_definitions, ios, block_names)
+
         self.chips = []
         for chip_def in root:
             if "chip" in chip_def.tag:
-                self.chips.append(Chip(filename="", dict=chip_def, waferProcessList=waferProcessList, assemblyProcessList=assemblyProcessList, testProcessList=testProcessList, layers=layers, ios=ios, adjacency_matrix_definitions=adjacency_matrix_definitions, block_names=block_names, static=static))
+                self.chips.append(Chip(filename="", dict=chip_def, waferProcessList=waferProcessList, assemblyProcessList=assemblyProcessList, testProcessList=testProcessList, layers=layers, ios=ios, adjacency_matrix_definitions=adjacency_matrix_definitions, block_names=block_names, static=static, netlist=netlist))
+        for chip in self.chips:
+            chip.parent = self
 
         self.name = attributes["name"]                                    # Given Parameter
         self.coreArea = float(attributes["coreArea"])                     # Given Parameter
@@ -1505,6 +2126,7 @@ class Chip:
         self.testProcess = self.getTestProcess(attributes["test_process"], testProcessList)
          
         self.stackup = self.buildStackup(attributes["stackup"], layers)                    # Given Parameter
+        self.stackupArrays = Stackup(self.stackup)                                          # Compiled from Stackup
 
         self.nre_design_cost = float(attributes["nre_design_cost"])        # Given Parameter
         self.quantity = int(attributes["quantity"])                       # Given Parameter
@@ -1513,7 +2135,7 @@ class Chip:
         self.core_voltage = float(attributes["core_voltage"])                    # Given Parameter
         self.static = static 
          
-        if self.name == "" or self.assemblyProcess == "" or self.stackup == [] or ios == [] or adjacency_matrix_definitions == {}:
+        if self.name == "" or self.assemblyProcess == "" or self.stackup == [] or ios == [] or netlist.get_num_io_types() == 0:
             print("Error: Chip not fully defined.")
             print("Chip " + self.name + " has parameters coreArea = " + str(self.coreArea) + ", cost = " + str(self.cost) + ", chip_yield = " + str(self.chip_yield) + ", quality = " + str(self.quality) + ", assemblyProcess = " + str(self.assemblyProcess) + ", stackup = " + str(self.stackup) + ", chips = " + str(self.chips) + ", power = " + str(self.power) + ".")
             sys.exit(1)
@@ -1522,20 +2144,29 @@ class Chip:
         self.coreArea = float(attributes["coreArea"])                            # Given Parameter
         # If core area is given, it is possible that the area will be determined by the size of the stacked chiplets or of the IO pads.
 
-        self.stack_power = self.computeStackPower()          # Computed Parameter
-
         # Compute all computed parameters.
         #self.adjacencyMatrixList = self.buildAdjacencyMatrices(adjacency_matrix_definitions, ios)   # Definitions Given for this Parameter, Needs to be Constructed
-        self.globalAdjacencyMatrix = adjacency_matrix_definitions
         self.blockNames = block_names
+        self.netlist = netlist
         self.io_list = ios
 
         self.quality = self.testProcess.computeQuality(self.chips)            # Computed or Given Parameter
 
-        self.area = self.computeArea()                                      # Computed Parameter Stored to Save Compute Time
-        self.cost = self.computeCost()                      # Computed Parameter
-        self.chip_yield = self.computeChipYield()           # Computed Parameter
+        return
 
+    # Mark the computed parameters of this chip and all of its ancestors as dirty so they are recomputed on the next query.
+    # Chips outside of the path to the root keep their computed values.
+    def markDirty(self) -> None:
+        chip = self
+        while chip != None:
+            chip.area = None
+            chip.cost = None
+            chip.chip_yield = None
+            chip.stack_power = None
+            chip.signal_count = None
+            chip.signal_with_reach_count = None
+            chip.chips_signal_count = None
+            chip = chip.parent
         return
 
     def computeStackPower(self) -> float:
@@ -1599,11 +2230,14 @@ class Chip:
                 print("Error: Number of layers " + layer_specification[0] + " not valid for " + layer_specification[1] + ".")
                 sys.exit(1)
         n_layers = len(stackup_names)
+        # Map each name to the first layer with that name so each stackup entry is a single lookup.
+        layers_by_name = {}
+        for l in layers:
+            if l.get_name() not in layers_by_name:
+                layers_by_name[l.get_name()] = l
         for layer in stackup_names:
-            for l in layers:
-                if l.get_name() == layer:
-                    stackup.append(l)
-                    break
+            if layer in layers_by_name:
+                stackup.append(layers_by_name[layer])
         if len(stackup) != n_layers:
             print("Error: Stackup number of layers does not match definition, make sure all selected layers are included in the layer definition.")
             sys.exit(1)
@@ -1622,6 +2256,7 @@ class Chip:
             return 1
         else:
             self.name = value
+            self.markDirty()
             return 0
 
     def get_coreArea(self) -> float:
@@ -1633,6 +2268,7 @@ class Chip:
             return 1
         else:
             self.coreArea = value
+            self.markDirty()
             return 0
 
     def get_buried(self) -> bool:
@@ -1644,12 +2280,17 @@ class Chip:
             return 1
         else:
             self.buried = value
+            self.markDirty()
             return 0
     
     def get_cost(self) -> float:
+        if self.cost == None:
+            self.cost = self.computeCost()
         return self.cost
     
     def get_chip_yield(self) -> float:
+        if self.chip_yield == None:
+            self.chip_yield = self.computeChipYield()
         return self.chip_yield
     
     def get_quality(self) -> float:
@@ -1672,6 +2313,7 @@ class Chip:
             return 1
         else:
             self.assemblyProcess = value
+            self.markDirty()
             return 0
     
     def get_stackup(self) -> list:
@@ -1683,8 +2325,28 @@ class Chip:
             return 1
         else:
             self.stackup = layer_list
+            self.stackupArrays = Stackup(layer_list)
+            self.markDirty()
+            return 0
+
+    def get_stackupArrays(self):
+        return self.stackupArrays
+
+    def get_waferProcess(self):
+        return self.waferProcess
+
+    def set_waferProcess(self, value) -> int:
+        if (self.static):
+            print("Error: Cannot change static chip.")
+            return 1
+        else:
+            self.waferProcess = value
+            self.markDirty()
             return 0
 
+    def get_netlist(self):
+        return self.netlist
+
     def get_testProcess(self):
         return self.testProcess
     
@@ -1694,6 +2356,7 @@ class Chip:
             return 1
         else:
             self.testProcess = value
+            self.markDirty()
             return 0
     
     def get_chips_len(self) -> int:
@@ -1737,6 +2400,7 @@ class Chip:
             return 1
         else:
             self.power = value
+            self.markDirty()
             return 0
     
     def get_core_voltage(self) -> float:
@@ -1748,22 +2412,32 @@ class Chip:
             return 1
         else:
             self.core_voltage = value
+            self.markDirty()
             return 0
 
     def get_stack_power(self) -> list:
+        if self.stack_power == None:
+            self.stack_power = self.computeStackPower()
         return self.stack_power
     
     def set_stack_power(self) -> int:
+        self.markDirty()
         self.stack_power = self.computeStackPower()
         return 0
 
     def getArea(self) -> float:
+        if self.area == None:
+            self.area = self.computeArea()
         return self.area
     
     def setArea(self) -> int:
+        self.markDirty()
         self.area = self.computeArea()
         return 0
 
+    def get_parent(self):
+        return self.parent
+
     def get_stacked_die_area(self) -> float:
         stacked_die_area = 0.0
         for chip in self.chips:
@@ -1780,6 +2454,7 @@ class Chip:
             return 1
         else:
             self.quantity = value
+            self.markDirty()
             return 0
 
     def get_nre_design_cost(self) -> float:
@@ -1791,6 +2466,7 @@ class Chip:
             return 1
         else:
             self.nre_design_cost = value
+            self.markDirty()
             return 0
 
     def get_static(self) -> bool:
@@ -1809,10 +2485,10 @@ class Chip:
         print("Chip Core Area: " + str(self.coreArea))
         print("Area of IO Cells: " + str(self.get_ioArea()))
         print("Number of Chip Power Pads: " + str(self.get_powerPads()))
-        print("Number of Signal Pads: " + str(self.get_signal_count(self.get_chip_list())[0]))
-        print("Total number of pads: " + str(self.get_powerPads() + self.get_signal_count(self.get_chip_list())[0]))
+        print("Number of Signal Pads: " + str(self.get_chip_signal_count()[0]))
+        print("Total number of pads: " + str(self.get_powerPads() + self.get_chip_signal_count()[0]))
         print("Area required by pads: " + str(self.get_padArea()))
-        print("Chip Calculated Area: " + str(self.area))
+        print("Chip Calculated Area: " + str(self.getArea()))
         print("Chip Cost: " + str(self.get_cost()))
         print("Self Cost: " + str(self.getLayerAwareCost()))
         print("Chip Yield: " + str(self.get_chip_yield()))
@@ -1865,24 +2541,27 @@ class Chip:
         new_area = (math.sqrt(area)+2*border)**2
         return new_area
 
+    # Get the index of the chip in the global adjacency matrices, or None if the chip is not a block in the netlist.
+    def get_block_index(self):
+        return self.netlist.get_block_index(self.get_name())
+
+    # Get the sorted indices of the blocks named in the internal block list.
+    # Only names at the top level of the list are matched. The nested lists built by get_chip_list() for stacked chips are not block names.
+    def get_internal_block_indices(self, internal_block_list) -> list:
+        internal_block_list_indices = set()
+        for name in internal_block_list:
+            if isinstance(name, str) and self.netlist.get_block_index(name) != None:
+                internal_block_list_indices.add(self.netlist.get_block_index(name))
+        return sorted(internal_block_list_indices)
+
     # Get the area of the IOs on the chip.
     def get_ioArea(self):
-        # TODO: Ultimately, this needs to look at the adjacency matrices and count the number of connections. For now, filler.
-        io_area = 0.0
-        block_index = None
-        for i in range(len(self.blockNames)):
-            if self.blockNames[i] == self.get_name():
-                block_index = i
-                break
+        block_index = self.get_block_index()
         if block_index == None:
             return 0
-        for io_type in self.globalAdjacencyMatrix:
-            # TODO: Fix this when the adjacency matrix is properly implemented.
-            for io in self.io_list:
-                if io.get_type() == io_type:
-                    break
-            # Add all the entries in the row and column of the global adjacency matrix with the index correesponding to the name of the chip and weight with the wire_count of the IO type.
-            io_area += sum(self.globalAdjacencyMatrix[io_type][block_index][:]) * io.get_tx_area() + sum(self.globalAdjacencyMatrix[io_type][:][block_index]) * io.get_rx_area()
+        # Add all the entries in the row of the global adjacency matrix with the index corresponding to the name of the chip and weight with the TX and RX area of each IO type.
+        # The original loop indexed the column as [:][block_index], which selects the same row, so the row sum is used for both the TX and RX area.
+        io_area = self.netlist.get_io_area(block_index)
 
         return io_area
 
@@ -1892,53 +2571,25 @@ class Chip:
 
     # Get number of Power Pads
     def get_powerPads(self):
-        power = self.get_power() + self.get_stack_power() + self.get_signal_power(self.get_chip_list())
+        # The signal power does not depend on the internal block list, so the chip list is not built here.
+        power = self.get_power() + self.get_stack_power() + self.get_signal_power([])
         power_pads = math.ceil(power / self.assemblyProcess.get_power_per_pad(self.get_core_voltage()))
         power_pads = power_pads*2 # Multiply by 2 for ground and power.
         return power_pads
 
     # Get the area taken up by the grid of pads on the bottom of the chip at the given pitch.
     def get_padArea(self):
+        # A chip that is not a block in the netlist has no signals and so no reach classes to fit pads within.
+        if self.get_block_index() == None:
+            return 0.0
         # TODO: This needs to compute the size of the grid needed for the number of pads. For now, filler.
         num_pads = self.get_powerPads()
-        signal_pads, signal_with_reach_count = self.get_signal_count(self.get_chip_list())
+        signal_pads, signal_with_reach_count = self.get_chip_signal_count()
         num_pads += signal_pads
 
-        area_per_pad = self.assemblyProcess.get_bonding_pitch()**2
-
-        # Create a list of reaches by taking the keys from the signal_with_reach_count dictionary and converting to floats.
-        reaches = [float(key) for key in signal_with_reach_count.keys()]
-        # Sort the reaches from smallest to largest.
-        reaches.sort()
-        current_side = 0.0
-        current_count = 0
-        for reach in reaches:
-            reach_with_separation = reach - self.assemblyProcess.get_die_separation()
-            if reach_with_separation < 0:
-                print("Error: Reach is smaller than chip separation. Exiting...")
-                sys.exit(1)
-            current_count += signal_with_reach_count[str(reach)]
-            # Find the minimum boundary that would contain all the pads with the current reach.
-            required_area = current_count*area_per_pad
-            if reach_with_separation < current_side:
-                usable_area = reach_with_separation**2 + 2*reach_with_separation*current_side
-            else:
-                usable_area = current_side**2
-            if usable_area <= required_area:
-                if math.sqrt(required_area) > reach_with_separation:
-                    new_req_side = (required_area - reach_with_separation**2)/(2*reach_with_separation)
-                else:
-                    new_req_side = math.sqrt(required_area)
-                # Round up to the nearest multiple of bonding pitch.
-                new_req_side = math.ceil(new_req_side/self.assemblyProcess.get_bonding_pitch())*self.assemblyProcess.get_bonding_pitch()
-                if new_req_side > current_side:
-                    current_side = new_req_side
-        required_area = current_side**2
-        grid_side = math.ceil(current_side / self.assemblyProcess.get_bonding_pitch())
-
-        pad_area = grid_side * grid_side * area_per_pad
-
-        return pad_area
+        pad_required_area = pad_area(self.netlist.get_reach_values(), signal_with_reach_count, self.assemblyProcess.get_bonding_pitch(), self.assemblyProcess.get_die_separation())
+
+        return float(pad_required_area)
 
     # Get the area of the interposer based on areas of the consituent chiplets.
     # Note that this is an approximation that assumes square chiplets that pack perfectly so it is an optimistic solution that actually gives a lower bound on area.
@@ -1964,17 +2615,20 @@ class Chip:
  
     def computeNumberReticles(self, area) -> int:
         # TODO: Ground this by actually packing rectangles to calculate a more accurate number of reticles.
-        reticle_area = self.get_reticle_x()*self.get_reticle_y()
-        num_reticles = math.ceil(area/reticle_area)
-        largest_square_side = math.floor(math.sqrt(num_reticles))
-        largest_square_num_reticles = largest_square_side**2
-        num_stitches = largest_square_side*(largest_square_side-1)*2+2*(num_reticles-largest_square_num_reticles)-math.ceil((num_reticles-largest_square_num_reticles)/largest_square_side)
-        return num_reticles, num_stitches
+        key = ("computeNumberReticles", area, self.get_reticle_x(), self.get_reticle_y())
+        found, value = computation_cache.lookup(key)
+        if found:
+            return value
+        num_reticles = reticle.computeNumberReticles(area, self.get_reticle_x(), self.get_reticle_y())
+        num_stitches = reticle.computeNumberStitches(num_reticles)
+        value = (int(num_reticles), int(num_stitches))
+        computation_cache.store(key, value)
+        return value
         
     def computeLayerAwareYield(self) -> float:
-        layer_yield = 1.0
-        for layer in self.stackup:
-            layer_yield *= layer.layerYield(self.get_coreArea() + self.get_ioArea())
+        # Stitches are determined by the full die area, while defects are determined by the core and IO area.
+        num_reticles, num_stitches = self.computeNumberReticles(self.getArea())
+        layer_yield = self.stackupArrays.stackupYield(self.get_coreArea() + self.get_ioArea(), num_stitches)
 
         return layer_yield
 
@@ -1988,44 +2642,29 @@ class Chip:
     def get_signal_count(self,internal_block_list):
         # print("Getting signal count")
         # print("Internal block list = " + str(internal_block_list) + ".")
+        return self.signalCountExcluding(self.get_internal_block_indices(internal_block_list))
+
+    # Count the signals leaving the chip, skipping connections to the blocks with the given indices.
+    def signalCountExcluding(self, internal_block_list_indices):
         signal_count = 0
-        # This is a dictionary where the key is the reach and the value is the number of signals with that reach.
-        signal_with_reach_count = {}
-
-        block_index = None
-        internal_block_list_indices = []
-        for i in range(len(self.blockNames)):
-            if self.blockNames[i] == self.get_name():
-                block_index = i
-            if self.blockNames[i] in internal_block_list:
-                internal_block_list_indices.append(i)
+        # This is a histogram of the number of signals in each reach class of the netlist. The reach of each class is given by netlist.get_reach_values().
+        signal_with_reach_count = np.zeros(len(self.netlist.get_reach_values()))
+
+        block_index = self.get_block_index()
         if block_index == None:
-            return 0, {}
-        for io_type in self.globalAdjacencyMatrix:
-            # TODO: Fix this when the adjacency matrix is properly implemented.
-            for io in self.io_list:
-                if io.get_type() == io_type:
-                    break
-            if io.get_bidirectional():
-                bidirectional_factor = 0.5
+            return 0, signal_with_reach_count
+        # Add all the entries in the row and column of the global adjacency matrix with the index correesponding to the name of the chip and weight with the wire_count of the IO type.
+        # Connections to blocks in the internal block list are skipped.
+        if len(internal_block_list_indices) < self.netlist.get_num_blocks():
+            # The chip list of a chip names only the chip itself at the top level, so this is usually precomputed for all blocks.
+            if internal_block_list_indices == [block_index]:
+                io_type_signals = self.netlist.get_boundary_signal_counts(block_index)
+                signal_with_reach_count = self.netlist.get_boundary_reach_counts(block_index)
             else:
-                bidirectional_factor = 1.0
-            # Add all the entries in the row and column of the global adjacency matrix with the index correesponding to the name of the chip and weight with the wire_count of the IO type.
-            for j in range(len(self.globalAdjacencyMatrix[io_type][block_index][:])):
-                # print("Internal block list indices = " + str(internal_block_list_indices) + ".")
-                # print("Adjacency matrix:" + str(self.globalAdjacencyMatrix[io_type][:][:]))
-                if j not in internal_block_list_indices:
-                    # print("Adding to signal count for " + self.blockNames[j] + ".")
-                    # print("io signal width = " + str(io.get_wire_count()) + ".")
-                    # print("Signal count before = " + str(signal_count) + ".")
-                    signal_count += (self.globalAdjacencyMatrix[io_type][block_index][j] + self.globalAdjacencyMatrix[io_type][j][block_index]) * io.get_wire_count() * bidirectional_factor
-                    # print("Signal count after = " + str(signal_count) + ".")
-                    if str(io.get_reach()) in signal_with_reach_count:
-                        signal_with_reach_count[str(io.get_reach())] += (self.globalAdjacencyMatrix[io_type][block_index][j] + self.globalAdjacencyMatrix[io_type][j][block_index]) * io.get_wire_count() * bidirectional_factor
-                    else:
-                        signal_with_reach_count[str(io.get_reach())] = (self.globalAdjacencyMatrix[io_type][block_index][j] + self.globalAdjacencyMatrix[io_type][j][block_index]) * io.get_wire_count() * bidirectional_factor
-            #signal_count += (sum(self.globalAdjacencyMatrix[io_type][block_index][:]) + sum(self.globalAdjacencyMatrix[io_type][:][block_index])) * io.get_wire_count()
-        
+                io_type_signals = self.netlist.compute_signal_counts(block_index, internal_block_list_indices)
+                signal_with_reach_count = self.netlist.compute_reach_counts(io_type_signals)
+            signal_count = np.sum(io_type_signals)
+
         # print("Signal count = " + str(signal_count) + ".")
         # print("Signal with reach count = " + str(signal_with_reach_count) + ".")
 
@@ -2034,26 +2673,11 @@ class Chip:
         return signal_count, signal_with_reach_count
 
     def get_signal_power(self,internal_block_list) -> float:
-        signal_power = 0.0
-        block_index = None
-        internal_block_list_indices = []
-        for i in range(len(self.blockNames)):
-            if self.blockNames[i] == self.get_name():
-                block_index = i
-            if self.blockNames[i] in internal_block_list:
-                internal_block_list_indices.append(i)
+        block_index = self.get_block_index()
         if block_index == None:
             return 0
-        for io_type in self.globalAdjacencyMatrix:
-            # TODO: Fix this when the adjacency matrix is properly implemented.
-            for io in self.io_list:
-                if io.get_type() == io_type:
-                    break
-            if io.get_bidirectional():
-                bidirectional_factor = 0.5
-            else:
-                bidirectional_factor = 1.0
-            signal_power += (sum(self.globalAdjacencyMatrix[io_type][block_index][:]) + sum(self.globalAdjacencyMatrix[io_type][:][block_index])) * io.get_bandwidth() * io.get_energy_per_bit() * bidirectional_factor
+        # As in get_ioArea, the row sum is counted twice.
+        signal_power = self.netlist.get_signal_power(block_index)
         return signal_power
 
     def get_chip_list(self):
@@ -2063,14 +2687,39 @@ class Chip:
         chip_list.append(self.get_name())
         return chip_list
 
-    def get_chips_signal_count(self) -> int:
-        signal_count = 0
+    # The top level of the chip list of a chip holds only the name of the chip, so the internal block indices of a chip list are the index of the chip, if it is in the netlist.
+    def chipListBlockIndices(self) -> list:
+        block_index = self.get_block_index()
+        if block_index == None:
+            return []
+        return [block_index]
+
+    # Compute the signal counts of this chip and every stacked chip in one post-order traversal.
+    # Each chip counts the signals leaving itself with its own chip list as the internal block list. A parent then adds up
+    #  the signals leaving each stacked chip with the parent chip list as the internal block list. Subtrees that already
+    #  have their counts are not visited again, so the whole tree is computed in time linear in its size.
+    def computeSignalCounts(self) -> None:
+        for chip in self.chips:
+            if chip.chips_signal_count == None:
+                chip.computeSignalCounts()
+        internal_block_list_indices = self.chipListBlockIndices()
+        self.signal_count, self.signal_with_reach_count = self.signalCountExcluding(internal_block_list_indices)
+        chips_signal_count = 0
+        for chip in self.chips:
+            chips_signal_count += chip.signalCountExcluding(internal_block_list_indices)[0]
+        self.chips_signal_count = chips_signal_count
+        return
 
-        internal_chip_list = self.get_chip_list()
+    # Get the number of signals leaving the chip, equivalent to get_signal_count(get_chip_list()).
+    def get_chip_signal_count(self):
+        if self.signal_count == None:
+            self.computeSignalCounts()
+        return self.signal_count, self.signal_with_reach_count
 
-        for chip in self.chips:
-            signal_count += chip.get_signal_count(internal_chip_list)[0]
-        return signal_count
+    def get_chips_signal_count(self) -> int:
+        if self.chips_signal_count == None:
+            self.computeSignalCounts()
+        return self.chips_signal_count
 
     def computeChipYield(self) -> float:
         chip_yield = self.computeLayerAwareYield()
@@ -2093,15 +2742,12 @@ class Chip:
         return usable_wafer_area
 
     def getLayerAwareCost(self):
-        cost = 0
-        for layer in self.stackup:
-            cost += layer.layerCost(self.area, self.waferProcess)
+        # Every layer in the stackup shares the same die area and wafer process, so all layers are evaluated in one vector expression.
+        cost = self.stackupArrays.stackupCost(self.getArea(), self.waferProcess)
         return cost
 
     def getMaskCost(self):
-        cost = 0
-        for layer in self.stackup:
-            cost += layer.get_mask_cost()
+        cost = self.stackupArrays.stackupMaskCost()
         return cost
 
     def computeCost(self) -> float:
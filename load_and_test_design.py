@@ -5,6 +5,7 @@
 import design as d
 import readDesignFromFile as readDesign
 import sys
+import os
 import time
 
 
@@ -12,32 +13,52 @@ import time
 def main():
     # Get start time
     start_time = time.time()
-    # Read the file names as command line arguments.
-    if len(sys.argv) != 8:
-        print("Usage: python load_and_test_design.py <io_file> <layer_file> <wafer_process_file> <assembly_process_file> <test_file> <netlist_file> <chip_file>")
+    # Separate the optional flags from the file names.
+    flags = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+
+    # Compile the library files into a bundle if requested.
+    if "--compile-library" in flags:
+        if len(args) != 6 or len(flags) != 1:
+            print("Usage: python load_and_test_design.py --compile-library <io_file> <layer_file> <wafer_process_file> <assembly_process_file> <test_file> <bundle_file>")
+            return 1
+        return readDesign.compileLibraryBundle(args[0], args[1], args[2], args[3], args[4], args[5])
+
+    # Read the file names as command line arguments. The library may be given as the five definition files or as one compiled bundle.
+    if len(args) not in [3, 7] or any(flag not in ["--sparse", "--cache"] for flag in flags):
+        print("Usage: python load_and_test_design.py <io_file> <layer_file> <wafer_process_file> <assembly_process_file> <test_file> <netlist_file> <chip_file> [--sparse] [--cache]")
+        print("       python load_and_test_design.py <bundle_file> <netlist_file> <chip_file> [--sparse] [--cache]")
+        print("       python load_and_test_design.py --compile-library <io_file> <layer_file> <wafer_process_file> <assembly_process_file> <test_file> <bundle_file>")
         return 1
 
     # Read the File Names as Command Line Arguments
-    io_file = sys.argv[1]
-    layer_file = sys.argv[2]
-    wafer_process_file = sys.argv[3]
-    assembly_process_file = sys.argv[4]
-    test_file = sys.argv[5]
-    netlist_file = sys.argv[6]
-    chip_file = sys.argv[7]
+    netlist_file = args[-2]
+    chip_file = args[-1]
+    # Store the netlist as sparse matrices if requested.
+    sparse = "--sparse" in flags
+    # Cache the parsed netlist next to the netlist file if requested.
+    if "--cache" in flags:
+        netlist_cache_dir = os.path.join(os.path.dirname(os.path.abspath(netlist_file)), ".netlist_cache")
+    else:
+        netlist_cache_dir = None
 
     # Read the Design Library Files
-    io_list = readDesign.ioDefinitionListFromFile(io_file)
-    layer_list = readDesign.layerDefinitionListFromFile(layer_file)
-    wafer_process_list = readDesign.waferProcessDefinitionListFromFile(wafer_process_file)
-    assembly_process_list = readDesign.assemblyProcessDefinitionListFromFile(assembly_process_file)
-    test_process_list = readDesign.testProcessDefinitionListFromFile(test_file)
+    if len(args) == 3:
+        io_list, layer_list, wafer_process_list, assembly_process_list, test_process_list = readDesign.libraryBundleFromFile(args[0])
+    else:
+        io_list = readDesign.ioDefinitionListFromFile(args[0])
+        layer_list = readDesign.layerDefinitionListFromFile(args[1])
+        wafer_process_list = readDesign.waferProcessDefinitionListFromFile(args[2])
+        assembly_process_list = readDesign.assemblyProcessDefinitionListFromFile(args[3])
+        test_process_list = readDesign.testProcessDefinitionListFromFile(args[4])
 
     # Read the Design Netlist File
-    am, names = readDesign.globalAdjacencyMatrixFromFile(netlist_file,io_list)
+    am, names = readDesign.globalAdjacencyMatrixFromFile(netlist_file,io_list,sparse,netlist_cache_dir)
 
     # Read the System Definition
     sip = d.Chip(filename=chip_file,dict={},waferProcessList=wafer_process_list,assemblyProcessList=assembly_process_list,testProcessList=test_process_list,layers=layer_list,ios=io_list,adjacency_matrix_definitions=am,block_names=names,static=False)
+    # The netlist of the chip holds its own copy of the adjacency matrices.
+    del am
 
     # # Print the Design Description
     # sip.print_description()
@@ -0,0 +1,192 @@
+# ==============================================================================
+# = This file contains the dynamic programming optimizer for process choices. =
+# ==============================================================================
+
+# Each chip chooses an assembly process, a wafer process, a test process, and a stackup. A parent chip depends on the
+#  choices made in a stacked chip only through the area of the stacked chip, if it is not buried, the cost of the
+#  stacked chip divided by its yield, and the quality of the stacked chip given by its test process, which is part of
+#  the yield of the parent. The power and signal counts of a chip do not depend on these choices.
+# The optimizer visits the tree bottom up. For every subtree it keeps the Pareto set of (cost divided by yield, area,
+#  quality) over all of the choices in the subtree, dropping any option that costs at least as much, is at least as
+#  large, and has at most the quality of another. The sets of the stacked chips of a parent are combined one at a time
+#  by summing their costs and areas, multiplying their qualities, and pruning again, and each choice for the parent is
+#  evaluated for every combined option with sweep.evaluateNode. At the root the option with the minimum cost is
+#  selected and the choices are traced back down the tree.
+# Pruning by area is exact when the cost and yield of a parent do not improve as its stacked chips grow. The share of
+#  the layer cost that depends on reticle utilization is the exception, so in rare cases a slightly larger stacked chip
+#  can pack better into the reticle of its parent and the optimizer may miss that assignment.
+
+import sys
+import itertools
+import numpy as np
+import design as d
+import sweep
+
+
+process_kinds = ["assembly_process", "wafer_process", "test_process", "stackup"]
+
+# Define a function to get the process of one kind currently used by a chip.
+def currentProcess(chip, kind):
+    if kind == "assembly_process":
+        return chip.get_assemblyProcess()
+    elif kind == "wafer_process":
+        return chip.get_waferProcess()
+    elif kind == "test_process":
+        return chip.get_testProcess()
+    elif kind == "stackup":
+        return chip.get_stackup()
+    else:
+        print("Error: Invalid process kind " + str(kind) + ". Exiting...")
+        sys.exit(1)
+
+# Define a function to list the candidates of one kind for a chip.
+# Candidates may be None to keep the current process of every chip, a list of candidates for every chip, or a dictionary
+#  from chip name to a list of candidates, with chips that are not named keeping their current process. The current
+#  process is listed first when it is a candidate so that ties keep it.
+def processCandidates(chip, kind, candidates):
+    current = currentProcess(chip, kind)
+    if isinstance(candidates, dict):
+        candidates = candidates.get(chip.get_name(), None)
+    if candidates == None:
+        return [current]
+    if len(candidates) == 0:
+        print("Error: No candidates for " + kind + " of chip " + chip.get_name() + ". Exiting...")
+        sys.exit(1)
+    ordered = [candidate for candidate in candidates if candidate == current][:1]
+    ordered += [candidate for candidate in candidates if candidate != current]
+    return ordered
+
+# Define a function to find the options on the Pareto front of low cost, low area, and high quality.
+# Of options that are equal in all three, the first is kept. Returns the indices of the options that are kept.
+def paretoFront(costs, areas, qualities):
+    if np.any(qualities != qualities[0]):
+        # An option is dropped if another option is at least as good in every objective and either better in one or listed earlier.
+        at_least_as_good = (costs[:, np.newaxis] <= costs[np.newaxis, :]) & (areas[:, np.newaxis] <= areas[np.newaxis, :]) & (qualities[:, np.newaxis] >= qualities[np.newaxis, :])
+        better = (costs[:, np.newaxis] < costs[np.newaxis, :]) | (areas[:, np.newaxis] < areas[np.newaxis, :]) | (qualities[:, np.newaxis] > qualities[np.newaxis, :])
+        earlier = np.arange(len(costs))[:, np.newaxis] < np.arange(len(costs))[np.newaxis, :]
+        keep = np.flatnonzero(~np.any(at_least_as_good & (better | earlier), axis=0))
+        if len(keep) == 0:
+            keep = np.array([int(np.argmin(costs))])
+        return keep
+    # With equal qualities the front is found by sorting on area.
+    order = np.lexsort((costs, areas))
+    sorted_costs = costs[order]
+    lowest_smaller_cost = np.concatenate([[np.inf], np.minimum.accumulate(sorted_costs)[:-1]])
+    keep = order[sorted_costs < lowest_smaller_cost]
+    if len(keep) == 0:
+        keep = order[:1]
+    return keep
+
+# Define a function to find the Pareto set of a chip and its stacked chips.
+# Returns a dictionary of arrays of the area, cost, yield, and quality of each option, and a list with the choices of
+#  each option as a tuple of the process choice of the chip and the options chosen for each stacked chip. The options of
+#  the chip being optimized, given by root, are reduced to the one with the minimum cost.
+def optimizeSubtree(chip, candidates, root=False):
+    stacked_chips = chip.get_chips()
+    stacked_fronts = [optimizeSubtree(stacked_chip, candidates) for stacked_chip in stacked_chips]
+
+    # Combine the options of the stacked chips one chip at a time.
+    stacked_areas = np.zeros(1)
+    stacked_costs = np.zeros(1)
+    stacked_qualities = np.ones(1)
+    stacked_choices = [()]
+    for stacked_chip, front in zip(stacked_chips, stacked_fronts):
+        num_options = len(front["cost"])
+        if stacked_chip.get_buried():
+            front_areas = np.zeros(num_options)
+        else:
+            front_areas = front["area"]
+        areas = (stacked_areas[:, np.newaxis] + front_areas[np.newaxis, :]).ravel()
+        costs = (stacked_costs[:, np.newaxis] + (front["cost"]/front["yield"])[np.newaxis, :]).ravel()
+        qualities = (stacked_qualities[:, np.newaxis]*front["quality"][np.newaxis, :]).ravel()
+        keep = paretoFront(costs, areas, qualities)
+        stacked_choices = [stacked_choices[k // num_options] + (int(k % num_options),) for k in keep]
+        stacked_areas = areas[keep]
+        stacked_costs = costs[keep]
+        stacked_qualities = qualities[keep]
+    if not any(not stacked_chip.get_buried() for stacked_chip in stacked_chips):
+        stacked_area_list = []
+    else:
+        stacked_area_list = [stacked_areas]
+    stacked_cost_list = [stacked_costs] if len(stacked_chips) > 0 else []
+
+    # Evaluate every process choice of this chip against every combined option of the stacked chips.
+    process_lists = [processCandidates(chip, kind, candidates.get(kind, None)) for kind in process_kinds]
+    stackups = {}
+    areas = []
+    costs = []
+    yields = []
+    qualities = []
+    choices = []
+    num_stacked_options = len(stacked_costs)
+    for choice in itertools.product(*process_lists):
+        assembly_process, wafer_process, test_process, layers = choice
+        stackup_key = tuple(id(layer) for layer in layers)
+        if stackup_key not in stackups:
+            if layers == chip.get_stackup():
+                stackups[stackup_key] = chip.get_stackupArrays()
+            else:
+                stackups[stackup_key] = d.Stackup(layers)
+        area, cost, chip_yield = sweep.evaluateNode(chip, stacked_area_list, stacked_cost_list, assembly_process, wafer_process, stackups[stackup_key], chip.get_coreArea(), chip.get_quantity(), chip.get_nre_design_cost(), stacked_qualities)
+        areas.append(np.broadcast_to(area, (num_stacked_options,)))
+        costs.append(np.broadcast_to(cost, (num_stacked_options,)))
+        yields.append(np.broadcast_to(chip_yield, (num_stacked_options,)))
+        # The quality of this chip, which its parent multiplies into its yield, depends only on the test process of this chip.
+        qualities.append(np.full(num_stacked_options, test_process.computeQuality(stacked_chips)))
+        choices += [(choice, stacked_choices[i]) for i in range(num_stacked_options)]
+    areas = np.concatenate(areas)
+    costs = np.concatenate(costs)
+    yields = np.concatenate(yields)
+    qualities = np.concatenate(qualities)
+
+    # The root is selected by cost alone. The area of a buried chip does not matter to its parent.
+    if root:
+        keep = np.array([int(np.argmin(costs))])
+    elif chip.get_buried():
+        keep = paretoFront(costs/yields, np.zeros(len(costs)), qualities)
+    else:
+        keep = paretoFront(costs/yields, areas, qualities)
+    return {"area": areas[keep], "cost": costs[keep], "yield": yields[keep], "quality": qualities[keep], "choices": [choices[k] for k in keep], "stacked_fronts": stacked_fronts}
+
+# Define a function to trace the choices of an option back down the tree.
+def traceChoices(chip, front, option, assignment):
+    choice, stacked_options = front["choices"][option]
+    assignment.append((chip, dict(zip(process_kinds, choice))))
+    for stacked_chip, stacked_front, stacked_option in zip(chip.get_chips(), front["stacked_fronts"], stacked_options):
+        traceChoices(stacked_chip, stacked_front, stacked_option, assignment)
+    return assignment
+
+# Define a function to find the assignment of processes and stackups with the minimum cost for a chip and its stacked chips.
+# Candidates for each kind in process_kinds are given as for processCandidates, for example
+#  optimizeProcesses(chip, assembly_processes=assembly_process_list, wafer_processes={"interposer": [process_1, process_2]}).
+# Stackups are lists of layers as returned by Chip.get_stackup.
+# Returns a dictionary with the area, cost, and yield of the chip and the assignment as a list of (chip, choices) tuples
+#  in the order the tree is visited, where choices is a dictionary from process kind to the chosen process.
+def optimizeProcesses(chip, assembly_processes=None, wafer_processes=None, test_processes=None, stackups=None):
+    candidates = {
+        "assembly_process": assembly_processes,
+        "wafer_process": wafer_processes,
+        "test_process": test_processes,
+        "stackup": stackups
+    }
+    front = optimizeSubtree(chip, candidates, root=True)
+    results = {
+        "area": float(front["area"][0]),
+        "cost": float(front["cost"][0]),
+        "yield": float(front["yield"][0]),
+        "assignment": traceChoices(chip, front, 0, [])
+    }
+    return results
+
+# Define a function to apply an assignment from optimizeProcesses to the chips.
+def applyProcesses(assignment) -> int:
+    for chip, choices in assignment:
+        if chip.set_assemblyProcess(choices["assembly_process"]) != 0:
+            return 1
+        if chip.set_waferProcess(choices["wafer_process"]) != 0:
+            return 1
+        if chip.set_testProcess(choices["test_process"]) != 0:
+            return 1
+        if chip.set_stackup(choices["stackup"]) != 0:
+            return 1
+    return 0
@@ -0,0 +1,659 @@
+# ==============================================================================
+# = This file contains the Fiduccia-Mattheyses chiplet partitioner.           =
+# ==============================================================================
+
+# The partitioner assigns the blocks of a netlist to chiplets. Each chiplet is modelled as a chip with no stacked
+#  chips built with the stackup, wafer process, assembly process, quantity, and design NRE cost of a template chip.
+#  The cost of a chiplet is its cost divided by its yield, as a parent chip accounts for the cost of a stacked chip.
+# A chiplet is treated as a single block that merges its blocks, with the connections between its blocks removed as
+#  the old combine_blocks did. Its IO area, signal count, and pad area then follow the Netlist and Chip conventions:
+#  the IO area counts the connections leaving the chiplet and the connections of its blocks to themselves for both
+#  TX and RX, while the signal count used for the pad area counts the connections leaving and entering the chiplet.
+#  A chiplet holding one block costs the same as a Chip for that block built with the template processes.
+# For every chiplet the partition keeps the core area and the number of connections leaving, entering, and looping
+#  back to it for each IO type. Moving a block only changes these sums for the two chiplets involved, and the change is found by
+#  walking the connections of the moved block, so a move costs time proportional to the degree of the block.
+# Chiplets are split by recursive bisection. Each split is refined with Fiduccia-Mattheyses passes. Blocks are
+#  selected from gain buckets keyed by the reduction in the number of signals cut, and after every pass the moves
+#  are rolled back to the point where the combined cost of the two chiplets was lowest.
+# Blocks can also be clustered into groups that are merged and unmerged in time proportional to their number of
+#  neighboring groups, for exploring partitions bottom up.
+
+import sys
+import heapq
+import numpy as np
+import design as d
+import reticle
+
+
+# =========================================
+# Block Adjacency Class
+# =========================================
+# Edge lists of a netlist grouped by block in compressed sparse row form.
+# The class has the following attributes:
+#   num_blocks: The number of blocks.
+#   num_io_types: The number of IO types.
+#   out_indptr, out_neighbors, out_types, out_values: The connections leaving each block. The connections of block
+#    v are entries out_indptr[v] to out_indptr[v+1] of the other arrays, which hold the block at the other end, the
+#    IO type index, and the number of connections.
+#   in_indptr, in_neighbors, in_types, in_values: The connections entering each block in the same form.
+#   out_signals, in_signals: The number of signals of each connection, which is the number of connections weighted by
+#    the wire count and bidirectional factor of the IO type.
+#   self_values: (blocks x types) array of the connections from each block to itself, which are not included in the
+#    connection lists.
+# =========================================
+
+class BlockAdjacency:
+    def __init__(self, netlist) -> None:
+        self.num_blocks = netlist.get_num_blocks()
+        self.num_io_types = netlist.get_num_io_types()
+        if netlist.get_sparse():
+            edges = netlist.adjacency.tocoo()
+            types = edges.row // self.num_blocks
+            sources = edges.row % self.num_blocks
+            destinations = edges.col
+            values = edges.data
+        else:
+            types, sources, destinations = np.nonzero(netlist.adjacency)
+            values = netlist.adjacency[types, sources, destinations]
+        self.self_values = np.zeros((self.num_blocks, self.num_io_types))
+        loops = sources == destinations
+        np.add.at(self.self_values, (sources[loops], types[loops]), values[loops])
+        keep = (sources != destinations) & (values != 0)
+        types = types[keep].astype(np.int64)
+        sources = sources[keep].astype(np.int64)
+        destinations = destinations[keep].astype(np.int64)
+        values = np.asarray(values[keep], dtype=float)
+        signal_weights = netlist.wire_count*netlist.bidirectional_factor
+
+        order = np.argsort(sources, kind="stable")
+        self.out_indptr = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=self.num_blocks))])
+        self.out_neighbors = destinations[order]
+        self.out_types = types[order]
+        self.out_values = values[order]
+        self.out_signals = self.out_values*signal_weights[self.out_types]
+
+        order = np.argsort(destinations, kind="stable")
+        self.in_indptr = np.concatenate([[0], np.cumsum(np.bincount(destinations, minlength=self.num_blocks))])
+        self.in_neighbors = sources[order]
+        self.in_types = types[order]
+        self.in_values = values[order]
+        self.in_signals = self.in_values*signal_weights[self.in_types]
+        return
+
+    def get_num_blocks(self) -> int:
+        return self.num_blocks
+
+    def get_num_io_types(self) -> int:
+        return self.num_io_types
+
+    # Get the neighbors of a block and the number of signals to each, with a neighbor listed once per connection in either direction.
+    def get_neighbor_signals(self, block):
+        out_start, out_end = self.out_indptr[block], self.out_indptr[block + 1]
+        in_start, in_end = self.in_indptr[block], self.in_indptr[block + 1]
+        neighbors = np.concatenate([self.out_neighbors[out_start:out_end], self.in_neighbors[in_start:in_end]])
+        signals = np.concatenate([self.out_signals[out_start:out_end], self.in_signals[in_start:in_end]])
+        return neighbors, signals
+
+
+# =========================================
+# Partition Class
+# =========================================
+# An assignment of the blocks of a netlist to chiplets with the per chiplet sums needed to compute chiplet costs.
+# The class has the following attributes:
+#   netlist: The Netlist being partitioned.
+#   adjacency: The BlockAdjacency of the netlist.
+#   block_areas: Array of the core area of each block in mm^2.
+#   assignments: Array of the chiplet of each block.
+#   core_areas: Array of the core area of each chiplet.
+#   out_counts: (chiplets x types) array of the connections leaving each chiplet.
+#   in_counts: (chiplets x types) array of the connections entering each chiplet.
+#   self_counts: (chiplets x types) array of the connections from the blocks of each chiplet to themselves.
+#   costs: Array of the cost divided by the yield of each chiplet.
+#   stackup, wafer_process, assembly_process: The processes of the template chip used for every chiplet.
+#   quantity, nre_design_cost: The quantity and design NRE cost of the template chip used for every chiplet.
+# =========================================
+# The class has the following methods.
+# == Get/Set ==
+#   get_assignments()
+#   get_num_chiplets()
+#   get_chiplet_blocks(int): Returns the indices of the blocks in a chiplet.
+#   get_chiplet_block_names(int): Returns the names of the blocks in a chiplet.
+#   get_core_area(int)
+#   get_io_area(int)
+#   get_signal_count(int)
+#   get_chiplet_cost(int)
+#   get_total_cost()
+# == Computation ==
+#   addChiplet(): Adds an empty chiplet and returns its index.
+#   moveBlock(int,int,bool): Moves a block to a chiplet and updates the sums and costs of the two chiplets involved.
+#   updateCosts(list): Recomputes the costs of a list of chiplets from their sums.
+#   chipletCost(float,array,array,array): Computes the cost of a chiplet from its core area and connection counts. Also
+#    accepts arrays of chiplets.
+# =========================================
+
+class Partition:
+    def __init__(self, netlist, block_areas, template_chip, assignments=None, adjacency=None) -> None:
+        self.netlist = netlist
+        if adjacency == None:
+            adjacency = BlockAdjacency(netlist)
+        self.adjacency = adjacency
+        self.block_areas = np.asarray(block_areas, dtype=float)
+        if len(self.block_areas) != netlist.get_num_blocks():
+            print("Error: Number of block areas " + str(len(self.block_areas)) + " does not match the number of blocks " + str(netlist.get_num_blocks()) + ". Exiting...")
+            sys.exit(1)
+        if assignments is None:
+            assignments = np.zeros(netlist.get_num_blocks(), dtype=np.int64)
+        self.assignments = np.array(assignments, dtype=np.int64)
+        self.stackup = template_chip.get_stackupArrays()
+        self.wafer_process = template_chip.get_waferProcess()
+        self.assembly_process = template_chip.get_assemblyProcess()
+        self.quantity = template_chip.get_quantity()
+        self.nre_design_cost = template_chip.get_nre_design_cost()
+
+        num_chiplets = int(np.max(self.assignments)) + 1 if len(self.assignments) > 0 else 1
+        num_types = adjacency.get_num_io_types()
+        self.core_areas = np.bincount(self.assignments, weights=self.block_areas, minlength=num_chiplets)
+        self.out_counts = np.zeros((num_chiplets, num_types))
+        self.in_counts = np.zeros((num_chiplets, num_types))
+        sources = np.repeat(np.arange(adjacency.get_num_blocks()), np.diff(adjacency.out_indptr))
+        cut = self.assignments[sources] != self.assignments[adjacency.out_neighbors]
+        np.add.at(self.out_counts, (self.assignments[sources[cut]], adjacency.out_types[cut]), adjacency.out_values[cut])
+        np.add.at(self.in_counts, (self.assignments[adjacency.out_neighbors[cut]], adjacency.out_types[cut]), adjacency.out_values[cut])
+        self.self_counts = np.zeros((num_chiplets, num_types))
+        np.add.at(self.self_counts, self.assignments, adjacency.self_values)
+        self.costs = self.chipletCost(self.core_areas, self.out_counts, self.in_counts, self.self_counts)
+        return
+
+    # ===== Get/Set Functions =====
+
+    def get_assignments(self):
+        return self.assignments
+
+    def get_num_chiplets(self) -> int:
+        return len(self.core_areas)
+
+    def get_chiplet_blocks(self, chiplet):
+        return np.flatnonzero(self.assignments == chiplet)
+
+    def get_chiplet_block_names(self, chiplet) -> list:
+        block_names = self.netlist.get_block_names()
+        return [block_names[i] for i in self.get_chiplet_blocks(chiplet)]
+
+    def get_core_area(self, chiplet) -> float:
+        return self.core_areas[chiplet]
+
+    # As in Netlist.computeBlockMetrics, the connections leaving the chiplet are used for both the TX and RX area.
+    def get_io_area(self, chiplet) -> float:
+        row_sums = self.out_counts[chiplet] + self.self_counts[chiplet]
+        return np.sum(row_sums*self.netlist.tx_area + row_sums*self.netlist.rx_area)
+
+    def get_signal_count(self, chiplet) -> float:
+        return np.sum((self.out_counts[chiplet] + self.in_counts[chiplet])*self.netlist.wire_count*self.netlist.bidirectional_factor)
+
+    def get_chiplet_cost(self, chiplet) -> float:
+        return self.costs[chiplet]
+
+    def get_total_cost(self) -> float:
+        return np.sum(self.costs)
+
+    # ===== End of Get/Set Functions =====
+
+    # ===== Computation Functions =====
+
+    def addChiplet(self) -> int:
+        num_types = self.adjacency.get_num_io_types()
+        self.core_areas = np.append(self.core_areas, 0.0)
+        self.out_counts = np.vstack([self.out_counts, np.zeros((1, num_types))])
+        self.in_counts = np.vstack([self.in_counts, np.zeros((1, num_types))])
+        self.self_counts = np.vstack([self.self_counts, np.zeros((1, num_types))])
+        self.costs = np.append(self.costs, 0.0)
+        return len(self.core_areas) - 1
+
+    # This follows Chip.computeArea, Chip.computeChipYield, and Chip.computeCost for a chip with no stacked chips.
+    # The core areas may be an array with the connection counts carrying the IO types on an extra last axis, in which
+    #  case an array of chiplet costs is returned. Chiplets with no area cost nothing.
+    def chipletCost(self, core_area, out_counts, in_counts, self_counts):
+        netlist = self.netlist
+        core_area = np.asarray(core_area, dtype=float)
+        row_sums = out_counts + self_counts
+        io_area = np.sum(row_sums*netlist.tx_area + row_sums*netlist.rx_area, axis=-1)
+        signals = (out_counts + in_counts)*netlist.wire_count*netlist.bidirectional_factor
+        reach_values = netlist.get_reach_values()
+        reach_counts = signals @ (netlist.reach_classes[:, np.newaxis] == np.arange(len(reach_values))).astype(float)
+        pad_required_area = d.pad_area(reach_values, reach_counts, self.assembly_process.get_bonding_pitch(), self.assembly_process.get_die_separation())
+        empty = core_area + io_area <= 0.0
+        area = np.where(empty, 1.0, np.maximum(pad_required_area, core_area + io_area))
+        num_reticles = reticle.computeNumberReticles(area, self.wafer_process.get_reticle_x(), self.wafer_process.get_reticle_y())
+        num_stitches = reticle.computeNumberStitches(num_reticles)
+        chiplet_yield = self.stackup.stackupYield(core_area + io_area, num_stitches)
+        chiplet_yield = chiplet_yield*(self.assembly_process.assembly_yield(0, 0, 0.0)*self.wafer_process.get_wafer_process_yield())
+        cost = self.stackup.stackupCost(area, self.wafer_process)
+        cost = cost + self.assembly_process.assembly_cost(0, 0, 0.0)
+        cost = cost + (self.nre_design_cost + self.stackup.stackupMaskCost())/self.quantity
+        return np.where(empty, 0.0, cost/chiplet_yield)
+
+    # Move a block to a chiplet. Only the connections of the block are visited.
+    # If update_costs is False, the costs of the two chiplets are left for the caller to update.
+    def moveBlock(self, block, chiplet, update_costs=True) -> int:
+        source = self.assignments[block]
+        if source == chiplet:
+            return 0
+        adjacency = self.adjacency
+        num_types = adjacency.get_num_io_types()
+        out_start, out_end = adjacency.out_indptr[block], adjacency.out_indptr[block + 1]
+        in_start, in_end = adjacency.in_indptr[block], adjacency.in_indptr[block + 1]
+        out_chiplets = self.assignments[adjacency.out_neighbors[out_start:out_end]]
+        in_chiplets = self.assignments[adjacency.in_neighbors[in_start:in_end]]
+        out_types = adjacency.out_types[out_start:out_end]
+        in_types = adjacency.in_types[in_start:in_end]
+        out_values = adjacency.out_values[out_start:out_end]
+        in_values = adjacency.in_values[in_start:in_end]
+        # Connections from the block to, and into the block from, the source chiplet, the destination chiplet, and all other chiplets.
+        to_source = np.bincount(out_types[out_chiplets == source], weights=out_values[out_chiplets == source], minlength=num_types)
+        to_destination = np.bincount(out_types[out_chiplets == chiplet], weights=out_values[out_chiplets == chiplet], minlength=num_types)
+        to_other = np.bincount(out_types, weights=out_values, minlength=num_types) - to_source - to_destination
+        from_source = np.bincount(in_types[in_chiplets == source], weights=in_values[in_chiplets == source], minlength=num_types)
+        from_destination = np.bincount(in_types[in_chiplets == chiplet], weights=in_values[in_chiplets == chiplet], minlength=num_types)
+        from_other = np.bincount(in_types, weights=in_values, minlength=num_types) - from_source - from_destination
+
+        self.out_counts[source] += from_source - to_destination - to_other
+        self.in_counts[source] += to_source - from_destination - from_other
+        self.out_counts[chiplet] += to_source + to_other - from_destination
+        self.in_counts[chiplet] += from_source + from_other - to_destination
+        self.self_counts[source] -= adjacency.self_values[block]
+        self.self_counts[chiplet] += adjacency.self_values[block]
+        self.core_areas[source] -= self.block_areas[block]
+        self.core_areas[chiplet] += self.block_areas[block]
+        self.assignments[block] = chiplet
+        if update_costs:
+            self.updateCosts([source, chiplet])
+        return 0
+
+    def updateCosts(self, chiplets) -> int:
+        self.costs[chiplets] = self.chipletCost(self.core_areas[chiplets], self.out_counts[chiplets], self.in_counts[chiplets], self.self_counts[chiplets])
+        return 0
+
+    # ===== End of Computation Functions =====
+
+
+# =========================================
+# Block Clusters Class
+# =========================================
+# Groups of merged blocks with the connections between groups, for clustering the blocks of a netlist.
+# Groups are kept in a union-find forest without path compression, so that every merge can be undone in reverse
+#  order. The root of the larger group becomes the root of a merged group, so finding the root of a block takes time
+#  logarithmic in the number of blocks. Each group has a label that holds a map from the label of every neighboring
+#  group to a (2 x types) array of the connections from the group to the neighbor and from the neighbor to the group.
+#  A merge folds the map with fewer neighbors into the other and the merged group takes the label of the larger map,
+#  which need not be the label of the new root. Merging and unmerging therefore take time proportional to the number
+#  of neighbors of the group with fewer neighbors. The core area and the connections leaving and entering each group
+#  are updated with every merge.
+# The class has the following attributes:
+#   netlist: The Netlist being clustered.
+#   parent: Array of the parent of each block in the union-find forest. A block that is its own parent is a group root.
+#   size: Array of the number of blocks in the group of each root.
+#   children: List of the blocks merged directly into each block, used to list the blocks of a group.
+#   label: Array of the label of the group of each root.
+#   label_root: Array of the root of the group with each label.
+#   neighbors: List of the neighbor maps of each label, keyed by the labels of the neighboring groups.
+#   core_areas: Array of the core area of each group root.
+#   out_counts: (blocks x types) array of the connections leaving the group of each root.
+#   in_counts: (blocks x types) array of the connections entering the group of each root.
+#   self_counts: (blocks x types) array of the connections from the blocks of the group of each root to themselves.
+#   num_groups: The number of groups.
+#   history: Stack of the merges that can be undone.
+# =========================================
+# The class has the following methods.
+# == Get/Set ==
+#   get_num_groups()
+#   get_groups(): Returns the list of group roots.
+#   get_group(int): Returns the root of the group of a block.
+#   get_group_blocks(int): Returns the blocks in the group of a block.
+#   get_group_block_names(int): Returns the names of the blocks in the group of a block.
+#   get_group_neighbors(int): Returns the neighbor map of the group of a block keyed by the roots of the neighboring groups.
+#   get_core_area(int)
+#   get_io_area(int)
+#   get_signal_count(int)
+# == Computation ==
+#   mergeBlocks(int,int): Merges the groups of two blocks.
+#   unmergeBlocks(): Undoes the last merge.
+# =========================================
+
+class BlockClusters:
+    def __init__(self, netlist, block_areas=None, adjacency=None) -> None:
+        self.netlist = netlist
+        if adjacency == None:
+            adjacency = BlockAdjacency(netlist)
+        num_blocks = adjacency.get_num_blocks()
+        num_types = adjacency.get_num_io_types()
+        if block_areas is None:
+            block_areas = np.zeros(num_blocks)
+        self.core_areas = np.array(block_areas, dtype=float)
+        if len(self.core_areas) != num_blocks:
+            print("Error: Number of block areas " + str(len(self.core_areas)) + " does not match the number of blocks " + str(num_blocks) + ". Exiting...")
+            sys.exit(1)
+        self.parent = np.arange(num_blocks)
+        self.size = np.ones(num_blocks, dtype=np.int64)
+        self.children = [[] for i in range(num_blocks)]
+        self.neighbors = [{} for i in range(num_blocks)]
+        self.label = np.arange(num_blocks)
+        self.label_root = np.arange(num_blocks)
+        self.num_groups = num_blocks
+        self.history = []
+
+        sources = np.repeat(np.arange(num_blocks), np.diff(adjacency.out_indptr))
+        for source, destination, io_type, value in zip(sources.tolist(), adjacency.out_neighbors.tolist(), adjacency.out_types.tolist(), adjacency.out_values.tolist()):
+            if destination not in self.neighbors[source]:
+                self.neighbors[source][destination] = np.zeros((2, num_types))
+                self.neighbors[destination][source] = np.zeros((2, num_types))
+            self.neighbors[source][destination][0, io_type] += value
+            self.neighbors[destination][source][1, io_type] += value
+        self.out_counts = np.zeros((num_blocks, num_types))
+        self.in_counts = np.zeros((num_blocks, num_types))
+        np.add.at(self.out_counts, (sources, adjacency.out_types), adjacency.out_values)
+        np.add.at(self.in_counts, (adjacency.out_neighbors, adjacency.out_types), adjacency.out_values)
+        self.self_counts = adjacency.self_values.copy()
+        return
+
+    # ===== Get/Set Functions =====
+
+    def get_num_groups(self) -> int:
+        return self.num_groups
+
+    def get_groups(self):
+        return np.flatnonzero(self.parent == np.arange(len(self.parent)))
+
+    def get_group(self, block) -> int:
+        while self.parent[block] != block:
+            block = self.parent[block]
+        return int(block)
+
+    def get_group_blocks(self, block) -> list:
+        blocks = [self.get_group(block)]
+        for member in blocks:
+            blocks.extend(self.children[member])
+        return blocks
+
+    def get_group_block_names(self, block) -> list:
+        block_names = self.netlist.get_block_names()
+        return [block_names[i] for i in self.get_group_blocks(block)]
+
+    def get_group_neighbors(self, block) -> dict:
+        neighbors = self.neighbors[self.label[self.get_group(block)]]
+        return {int(self.label_root[label]): connections for label, connections in neighbors.items()}
+
+    def get_core_area(self, block) -> float:
+        return self.core_areas[self.get_group(block)]
+
+    def get_io_area(self, block) -> float:
+        # As in Partition.get_io_area, the group is treated as a single block with the connections between its blocks removed.
+        group = self.get_group(block)
+        row_sums = self.out_counts[group] + self.self_counts[group]
+        return np.sum(row_sums*self.netlist.tx_area + row_sums*self.netlist.rx_area)
+
+    def get_signal_count(self, block) -> float:
+        group = self.get_group(block)
+        return np.sum((self.out_counts[group] + self.in_counts[group])*self.netlist.wire_count*self.netlist.bidirectional_factor)
+
+    # ===== End of Get/Set Functions =====
+
+    # ===== Computation Functions =====
+
+    def mergeBlocks(self, block_1, block_2) -> int:
+        group_1 = self.get_group(block_1)
+        group_2 = self.get_group(block_2)
+        if group_1 == group_2:
+            print("Error: Cannot combine a group with itself.")
+            return 1
+        # The larger group stays the root, which keeps the depth of the forest logarithmic in the number of blocks.
+        if self.size[group_1] < self.size[group_2]:
+            group_1, group_2 = group_2, group_1
+        # Fold the neighbor map with fewer neighbors into the other. The merged group keeps the label of the larger map.
+        root_label = self.label[group_1]
+        other_label = self.label[group_2]
+        if len(self.neighbors[root_label]) >= len(self.neighbors[other_label]):
+            kept_label, folded_label = root_label, other_label
+        else:
+            kept_label, folded_label = other_label, root_label
+        kept_neighbors = self.neighbors[kept_label]
+        between = kept_neighbors.pop(folded_label, None)
+        if between is not None:
+            self.neighbors[folded_label].pop(kept_label)
+        added = []
+        for neighbor, connections in self.neighbors[folded_label].items():
+            neighbor_map = self.neighbors[neighbor]
+            reverse = neighbor_map.pop(folded_label)
+            if neighbor in kept_neighbors:
+                kept_neighbors[neighbor] += connections
+                neighbor_map[kept_label] += reverse
+            else:
+                kept_neighbors[neighbor] = connections.copy()
+                neighbor_map[kept_label] = reverse.copy()
+                added.append(neighbor)
+        # Connections between the two groups become internal to the merged group.
+        if between is not None:
+            self.out_counts[group_1] -= between[0] + between[1]
+            self.in_counts[group_1] -= between[0] + between[1]
+            self.neighbors[folded_label][kept_label] = between[::-1].copy()
+        self.out_counts[group_1] += self.out_counts[group_2]
+        self.in_counts[group_1] += self.in_counts[group_2]
+        self.self_counts[group_1] += self.self_counts[group_2]
+        self.core_areas[group_1] += self.core_areas[group_2]
+        self.label[group_1] = kept_label
+        self.label_root[kept_label] = group_1
+        self.parent[group_2] = group_1
+        self.size[group_1] += self.size[group_2]
+        self.children[group_1].append(group_2)
+        self.num_groups -= 1
+        self.history.append((group_1, group_2, root_label, other_label, kept_label, folded_label, between, added))
+        return 0
+
+    def unmergeBlocks(self) -> int:
+        if len(self.history) == 0:
+            print("Error: No merges to undo.")
+            return 1
+        group_1, group_2, root_label, other_label, kept_label, folded_label, between, added = self.history.pop()
+        kept_neighbors = self.neighbors[kept_label]
+        added = set(added)
+        for neighbor, connections in self.neighbors[folded_label].items():
+            if neighbor == kept_label:
+                continue
+            neighbor_map = self.neighbors[neighbor]
+            if neighbor in added:
+                del kept_neighbors[neighbor]
+                reverse = neighbor_map.pop(kept_label)
+            else:
+                kept_neighbors[neighbor] -= connections
+                reverse = connections[::-1].copy()
+                neighbor_map[kept_label] -= reverse
+            neighbor_map[folded_label] = reverse
+        if between is not None:
+            kept_neighbors[folded_label] = between
+            self.out_counts[group_1] += between[0] + between[1]
+            self.in_counts[group_1] += between[0] + between[1]
+        self.out_counts[group_1] -= self.out_counts[group_2]
+        self.in_counts[group_1] -= self.in_counts[group_2]
+        self.self_counts[group_1] -= self.self_counts[group_2]
+        self.core_areas[group_1] -= self.core_areas[group_2]
+        self.label[group_1] = root_label
+        self.label[group_2] = other_label
+        self.label_root[root_label] = group_1
+        self.label_root[other_label] = group_2
+        self.parent[group_2] = group_2
+        self.size[group_1] -= self.size[group_2]
+        self.children[group_1].pop()
+        self.num_groups += 1
+        return 0
+
+    # ===== End of Computation Functions =====
+
+
+# =========================================
+# Gain Buckets Class
+# =========================================
+# Buckets of blocks keyed by integer gain with a heap of the keys of the non-empty buckets.
+# Each gain is scaled by gain_scale and rounded to select its bucket. The exact gains are kept so that gains can be
+#  updated by adding the change caused by a move.
+# The heap holds each key once, negated so the highest key is on top. A key is left in the heap when its bucket empties
+#  and dropped when it reaches the top, so finding the highest non-empty bucket does not scan the other keys.
+# =========================================
+
+class GainBuckets:
+    def __init__(self, gain_scale=2.0) -> None:
+        self.gain_scale = gain_scale
+        self.buckets = {}
+        self.block_gains = {}
+        self.block_keys = {}
+        self.key_heap = []
+        self.heap_keys = set()
+        return
+
+    def insert(self, block, gain) -> None:
+        key = int(round(gain*self.gain_scale))
+        self.block_gains[block] = gain
+        self.block_keys[block] = key
+        if key not in self.buckets:
+            self.buckets[key] = {}
+            if key not in self.heap_keys:
+                self.heap_keys.add(key)
+                heapq.heappush(self.key_heap, -key)
+        self.buckets[key][block] = None
+        return
+
+    def remove(self, block) -> float:
+        gain = self.block_gains.pop(block)
+        key = self.block_keys.pop(block)
+        del self.buckets[key][block]
+        if len(self.buckets[key]) == 0:
+            del self.buckets[key]
+        return gain
+
+    def update(self, block, change) -> None:
+        self.insert(block, self.remove(block) + change)
+        return
+
+    def contains(self, block) -> bool:
+        return block in self.block_keys
+
+    # Get the block with the highest gain for which allowed(block) is true, or None.
+    # Keys are popped from the heap in decreasing order until an allowed block is found, and the keys of the non-empty
+    #  buckets that were passed over are pushed back.
+    def best(self, allowed):
+        passed_keys = []
+        found = None
+        while len(self.key_heap) > 0 and found == None:
+            key = -heapq.heappop(self.key_heap)
+            if key not in self.buckets:
+                self.heap_keys.discard(key)
+                continue
+            passed_keys.append(key)
+            for block in self.buckets[key]:
+                if allowed(block):
+                    found = block
+                    break
+        for key in passed_keys:
+            heapq.heappush(self.key_heap, -key)
+        return found
+
+
+# Define a function to compute the gain of moving a block in a bisection, which is the reduction in the number of signals cut.
+def moveGain(partition, block, source, destination):
+    neighbors, signals = partition.adjacency.get_neighbor_signals(block)
+    neighbor_chiplets = partition.assignments[neighbors]
+    return np.sum(signals[neighbor_chiplets == destination]) - np.sum(signals[neighbor_chiplets == source])
+
+# Define a function to refine the bisection between two chiplets with Fiduccia-Mattheyses passes.
+# Each pass moves every block of the two chiplets at most once, choosing the highest gain block that keeps the core area
+#  of both chiplets within balance of half of their combined area. The sums of the two chiplets are recorded after every
+#  move and their costs are computed together at the end of the pass. The moves after the point with the lowest combined
+#  cost of the two chiplets are then undone. Passes stop when a pass keeps no moves.
+# Returns the combined cost of the two chiplets.
+def fiducciaMattheyses(partition, chiplet_a, chiplet_b, balance=0.1, max_passes=10, gain_scale=2.0):
+    chiplets = [chiplet_a, chiplet_b]
+    for pass_number in range(max_passes):
+        blocks = np.flatnonzero((partition.assignments == chiplet_a) | (partition.assignments == chiplet_b))
+        total_area = partition.core_areas[chiplet_a] + partition.core_areas[chiplet_b]
+        min_area = (1 - balance)/2*total_area
+        max_area = (1 + balance)/2*total_area
+
+        buckets = GainBuckets(gain_scale)
+        for block in blocks:
+            source = partition.assignments[block]
+            destination = chiplet_b if source == chiplet_a else chiplet_a
+            buckets.insert(block, moveGain(partition, block, source, destination))
+
+        # A move is allowed if it keeps both chiplets within balance or makes the split more balanced.
+        def allowed(block):
+            source = partition.assignments[block]
+            destination = chiplet_b if source == chiplet_a else chiplet_a
+            new_source_area = partition.core_areas[source] - partition.block_areas[block]
+            new_destination_area = partition.core_areas[destination] + partition.block_areas[block]
+            if new_source_area >= min_area and new_destination_area <= max_area:
+                return True
+            return abs(new_source_area - new_destination_area) < abs(partition.core_areas[source] - partition.core_areas[destination])
+
+        start_cost = partition.costs[chiplet_a] + partition.costs[chiplet_b]
+        moves = []
+        gains = []
+        core_areas = []
+        out_counts = []
+        in_counts = []
+        self_counts = []
+        while True:
+            block = buckets.best(allowed)
+            if block == None:
+                break
+            gains.append(buckets.remove(block))
+            source = partition.assignments[block]
+            destination = chiplet_b if source == chiplet_a else chiplet_a
+            partition.moveBlock(block, destination, update_costs=False)
+            moves.append((block, source))
+            core_areas.append(partition.core_areas[chiplets])
+            out_counts.append(partition.out_counts[chiplets])
+            in_counts.append(partition.in_counts[chiplets])
+            self_counts.append(partition.self_counts[chiplets])
+            # Only the unlocked neighbors of the moved block change gain. A neighbor left behind in the source chiplet
+            #  gains twice its signals to the block, and a neighbor in the destination chiplet loses them.
+            neighbors, signals = partition.adjacency.get_neighbor_signals(block)
+            neighbors, neighbor_indices = np.unique(neighbors, return_inverse=True)
+            signals = np.bincount(neighbor_indices, weights=signals, minlength=len(neighbors))
+            for neighbor, neighbor_signals in zip(neighbors, signals):
+                if buckets.contains(neighbor):
+                    if partition.assignments[neighbor] == source:
+                        buckets.update(neighbor, 2*neighbor_signals)
+                    else:
+                        buckets.update(neighbor, -2*neighbor_signals)
+        # Keep the number of moves with the lowest cost, breaking ties, such as chiplets too large to fit on a wafer,
+        #  by the largest reduction in the number of signals cut.
+        best_moves = 0
+        if len(moves) > 0:
+            costs = np.concatenate([[start_cost], np.sum(partition.chipletCost(np.array(core_areas), np.array(out_counts), np.array(in_counts), np.array(self_counts)), axis=-1)])
+            cut_reductions = np.concatenate([[0.0], np.cumsum(gains)])
+            best_moves = int(np.lexsort((-cut_reductions, costs))[0])
+        for block, source in reversed(moves[best_moves:]):
+            partition.moveBlock(block, source, update_costs=False)
+        partition.updateCosts(chiplets)
+        if best_moves == 0:
+            break
+    return partition.costs[chiplet_a] + partition.costs[chiplet_b]
+
+# Define a function to partition the blocks of a netlist into chiplets by recursive bisection.
+# The chiplet with the largest core area is split in two at each step. Its blocks are divided at random with the given
+#  seed and the split is refined with fiducciaMattheyses.
+# Returns the Partition.
+def partitionNetlist(netlist, block_areas, num_chiplets, template_chip, balance=0.1, max_passes=10, seed=None):
+    partition = Partition(netlist, block_areas, template_chip)
+    rng = np.random.default_rng(seed)
+    while partition.get_num_chiplets() < num_chiplets:
+        chiplet = int(np.argmax(partition.core_areas))
+        blocks = partition.get_chiplet_blocks(chiplet)
+        if len(blocks) < 2:
+            print("Warning: Chiplet " + str(chiplet) + " has fewer than two blocks and can not be split. Stopping at " + str(partition.get_num_chiplets()) + " chiplets.")
+            break
+        new_chiplet = partition.addChiplet()
+        for block in rng.permutation(blocks)[:len(blocks)//2]:
+            partition.moveBlock(block, new_chiplet, update_costs=False)
+        partition.updateCosts([chiplet, new_chiplet])
+        fiducciaMattheyses(partition, chiplet, new_chiplet, balance, max_passes)
+    return partition
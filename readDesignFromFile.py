@@ -5,8 +5,14 @@
 import design as d
 import numpy as np
 import xml.etree.ElementTree as ET
-import math
 import sys
+from array import array
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
 
 # Function to read the wafer process definitions.
 def waferProcessDefinitionListFromFile(filename):
@@ -172,65 +178,240 @@ def testProcessDefinitionListFromFile(filename):
     
     return test_process_list
 
+# Version of the library bundle format. Increment this when the library classes or bundle contents change.
+library_bundle_version = 1
+
+# Define a function to compile the library definition files into a single binary bundle.
+# The bundle holds the validated and static IO, layer, wafer process, assembly process, and test process lists.
+def compileLibraryBundle(io_file, layer_file, wafer_process_file, assembly_process_file, test_file, bundle_file):
+    bundle = {
+        "format": "chiplet_cost_model_library",
+        "version": library_bundle_version,
+        "io_list": ioDefinitionListFromFile(io_file),
+        "layer_list": layerDefinitionListFromFile(layer_file),
+        "wafer_process_list": waferProcessDefinitionListFromFile(wafer_process_file),
+        "assembly_process_list": assemblyProcessDefinitionListFromFile(assembly_process_file),
+        "test_process_list": testProcessDefinitionListFromFile(test_file),
+    }
+    with open(bundle_file, "wb") as f:
+        f.write(pickle.dumps(bundle, protocol=pickle.HIGHEST_PROTOCOL))
+    return 0
+
+# Define a function to read the library lists from a compiled bundle in a single read.
+# Bundles are unpickled, so they should only be loaded from trusted sources.
+# Returns the IO, layer, wafer process, assembly process, and test process lists.
+def libraryBundleFromFile(bundle_file):
+    with open(bundle_file, "rb") as f:
+        bundle = pickle.loads(f.read())
+    if not isinstance(bundle, dict) or bundle.get("format") != "chiplet_cost_model_library":
+        print("ERROR: " + bundle_file + " is not a library bundle.")
+        sys.exit(1)
+    if bundle["version"] != library_bundle_version:
+        print("ERROR: Library bundle " + bundle_file + " has version " + str(bundle["version"]) + " but version " + str(library_bundle_version) + " is required. Recompile the library.")
+        sys.exit(1)
+    return bundle["io_list"], bundle["layer_list"], bundle["wafer_process_list"], bundle["assembly_process_list"], bundle["test_process_list"]
+
 # Define a function to construct the global adjacency matrix from the netlist file.
-def globalAdjacencyMatrixFromFile(filename, io_list):
+# If sparse is True, each adjacency matrix is returned as a SciPy CSR matrix instead of a dense numpy array.
+# If cache_dir is given, the parsed netlist is stored there and reused on later calls with the same netlist and IO library.
+def globalAdjacencyMatrixFromFile(filename, io_list, sparse=False, cache_dir=None):
     # print("Reading netlist from file: " + filename)
-    # Read the XML file.
-    tree = ET.parse(filename)
-    root = tree.getroot()
+    edges = None
+    if cache_dir != None:
+        cache_path = os.path.join(cache_dir, netlistCacheKey(filename, io_list))
+        edges = readNetlistCache(cache_path)
+    if edges == None:
+        edges = netlistEdgesFromFile(filename, io_list)
+        if cache_dir != None:
+            writeNetlistCache(cache_path, edges)
+    net_types, type_indices, rows, columns, values, block_names = edges
+    global_adjacency_matrix = adjacencyMatricesFromEdges(net_types, type_indices, rows, columns, values, len(block_names), sparse)
+    return global_adjacency_matrix, block_names
 
-    # Split the root.attrib["block_names"] string at commas and store in list.
-    block_names = [] 
+# Version of the netlist cache format. Increment this when the cache contents change.
+netlist_cache_version = 1
 
-    # The output format is a dictionary of items with format {type: numpy array adjacencey matrix}
-    global_adjacency_matrix = {}
+# Define a function to compute the cache key for a netlist from the netlist contents and the IO library.
+def netlistCacheKey(filename, io_list):
+    key = hashlib.sha256()
+    key.update(("netlist_cache_version=" + str(netlist_cache_version) + "\n").encode())
+    with open(filename, "rb") as netlist_file:
+        for chunk in iter(lambda: netlist_file.read(1 << 20), b""):
+            key.update(chunk)
+    for io in io_list:
+        key.update(repr((io.get_type(), io.get_rx_area(), io.get_tx_area(), io.get_shoreline(), io.get_bandwidth(), io.get_wire_count(), io.get_bidirectional(), io.get_energy_per_bit(), io.get_reach())).encode())
+    return key.hexdigest()
+
+# Define a function to read the netlist edges from a cache directory.
+# The edge arrays are memory mapped rather than read. Returns None if there is no valid cache entry.
+def readNetlistCache(cache_path):
+    try:
+        with open(os.path.join(cache_path, "index.json"), "r") as index_file:
+            index = json.load(index_file)
+        if index["version"] != netlist_cache_version:
+            return None
+        type_indices = np.load(os.path.join(cache_path, "type_indices.npy"), mmap_mode="r")
+        rows = np.load(os.path.join(cache_path, "rows.npy"), mmap_mode="r")
+        columns = np.load(os.path.join(cache_path, "columns.npy"), mmap_mode="r")
+        values = np.load(os.path.join(cache_path, "values.npy"), mmap_mode="r")
+    except (OSError, ValueError, KeyError):
+        return None
+    return index["net_types"], type_indices, rows, columns, values, index["block_names"]
+
+# Define a function to write the netlist edges to a cache directory.
+# The entry is written to a temporary directory and renamed into place so a partially written entry is never read.
+# An existing entry that can not be read is moved aside and replaced. If another process renames a readable entry
+#  into place first, that entry is kept.
+def writeNetlistCache(cache_path, edges):
+    net_types, type_indices, rows, columns, values, block_names = edges
+    cache_dir = os.path.dirname(cache_path)
+    temp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = tempfile.mkdtemp(dir=cache_dir)
+        np.save(os.path.join(temp_path, "type_indices.npy"), type_indices)
+        np.save(os.path.join(temp_path, "rows.npy"), rows)
+        np.save(os.path.join(temp_path, "columns.npy"), columns)
+        np.save(os.path.join(temp_path, "values.npy"), values)
+        with open(os.path.join(temp_path, "index.json"), "w") as index_file:
+            json.dump({"version": netlist_cache_version, "net_types": net_types, "block_names": block_names}, index_file)
+        # mkdtemp makes the entry private to its owner, so give it the mode of a directory made under the umask so that
+        #  other users of a shared cache can read it.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o777 & ~umask)
+        try:
+            os.rename(temp_path, cache_path)
+            temp_path = None
+        except OSError:
+            if readNetlistCache(cache_path) == None:
+                # Move the unreadable entry aside so the rename of the new entry can succeed.
+                stale_path = tempfile.mkdtemp(dir=cache_dir)
+                try:
+                    os.rename(cache_path, os.path.join(stale_path, "entry"))
+                except FileNotFoundError:
+                    pass
+                shutil.rmtree(stale_path, ignore_errors=True)
+                try:
+                    os.rename(temp_path, cache_path)
+                    temp_path = None
+                except OSError:
+                    if readNetlistCache(cache_path) == None:
+                        raise
+    except OSError:
+        # The cache is only an optimization, so failing to write it is not an error.
+        print("Warning: Could not write netlist cache to " + cache_path + ".")
+    if temp_path != None:
+        shutil.rmtree(temp_path, ignore_errors=True)
+    return
+
+# Define a function to stream the net definitions from the netlist file.
+# Each net element is cleared and released once it has been consumed, so the full document is never held in memory.
+def netDefinitionsFromFile(filename):
+    depth = 0
+    root = None
+    for event, element in ET.iterparse(filename, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 1:
+                root = element
+        else:
+            depth -= 1
+            # Net definitions are the direct children of the root element.
+            if depth == 1:
+                yield element
+                element.clear()
+                root.clear()
+
+# Define a function to read the edges of the netlist in a single streaming pass.
+# Blocks and IO types are looked up in dictionaries, so the work per net is constant.
+# Edges are accumulated in typed arrays, so peak memory is proportional to the number of nets rather than the size of the XML text.
+# Returns the list of net types in the order they first appear, and arrays with one entry per edge giving the net type index,
+#  the TX block index, the RX block index, and the number of IO cells. Bidirectional nets add an edge in each direction.
+def netlistEdgesFromFile(filename, io_list):
+    # Map each IO type to its definition. If a type is defined more than once, the last definition is used.
+    io_definitions = {}
+    for io in io_list:
+        io_definitions[io.get_type()] = io
+
+    block_names = []
+    block_indices = {}
+    net_types = []
+    net_type_indices = {}
+    # Per net type lists of the IO bandwidth and direction.
+    io_bandwidths = []
+    io_bidirectional = []
+
+    type_indices = array("q")
+    rows = array("q")
+    columns = array("q")
+    bandwidths = array("d")
 
     # Iterate over the net definitions.
-    for net_def in root:
-        # Check if the type of net is already a key in the dictionary.
-        if net_def.attrib["type"] not in global_adjacency_matrix:
-            # print("Adding new net type to adjacency matrix: " + net_def.attrib["type"])
-            # If so, append the new net to the existing adjacency matrix.
-            global_adjacency_matrix[net_def.attrib["type"]] = np.zeros((len(block_names),len(block_names)))
+    for net_def in netDefinitionsFromFile(filename):
+        attributes = net_def.attrib
+        net_type = attributes["type"]
+        type_index = net_type_indices.get(net_type)
+        if type_index == None:
+            if net_type not in io_definitions:
+                print("ERROR: Net type " + net_type + " not found in io_list.")
+                sys.exit(1)
+            type_index = len(net_types)
+            net_type_indices[net_type] = type_index
+            net_types.append(net_type)
+            io_bandwidths.append(io_definitions[net_type].get_bandwidth())
+            io_bidirectional.append(bool(io_definitions[net_type].get_bidirectional()))
 
         # If block 1 or block 2 is not in the list of block names, add it.
-        if net_def.attrib["block0"] not in block_names:
-            # print("Adding new block to adjacency matrix: " + net_def.attrib["block0"])
-            block_names.append(net_def.attrib["block0"])
-            # Add a row and column to each numpy adjacency matrix.
-            for key in global_adjacency_matrix:
-                global_adjacency_matrix[key] = np.pad(global_adjacency_matrix[key],((0,1),(0,1)),'constant',constant_values=0)
-        if net_def.attrib["block1"] not in block_names:
-            # print("Adding new block to adjacency matrix: " + net_def.attrib["block1"])
-            block_names.append(net_def.attrib["block1"])
-            # Add a row and column to each numpy adjacency matrix.
-            for key in global_adjacency_matrix:
-                global_adjacency_matrix[key] = np.pad(global_adjacency_matrix[key],((0,1),(0,1)),'constant',constant_values=0)
-
-        io_bandwidth = None
-        bidirectional = None   
-        
-        # print("Searching for and IO type that matches " + net_def.attrib["type"])
-        for io in io_list:
-            #print(io.get_type())
-            if net_def.attrib["type"] == io.get_type():
-                io_bandwidth = io.get_bandwidth()
-                bidirectional = io.get_bidirectional()
-
-        if io_bandwidth == None or bidirectional == None:
-            print("ERROR: Net type " + net_def.attrib["type"] + " not found in io_list.")
-            sys.exit(1)
-
-        # Find the indices of the two blocks connected by the net.
-        block1_index = block_names.index(net_def.attrib["block0"])
-        block2_index = block_names.index(net_def.attrib["block1"])
-        if not bidirectional:
-            global_adjacency_matrix[net_def.attrib["type"]][block1_index,block2_index] += int(math.ceil(float(net_def.attrib["bandwidth"])/io_bandwidth))
+        block1_index = block_indices.get(attributes["block0"])
+        if block1_index == None:
+            block1_index = len(block_names)
+            block_indices[attributes["block0"]] = block1_index
+            block_names.append(attributes["block0"])
+        block2_index = block_indices.get(attributes["block1"])
+        if block2_index == None:
+            block2_index = len(block_names)
+            block_indices[attributes["block1"]] = block2_index
+            block_names.append(attributes["block1"])
+
+        type_indices.append(type_index)
+        rows.append(block1_index)
+        columns.append(block2_index)
+        bandwidths.append(float(attributes["bandwidth"]))
+
+    type_indices = np.frombuffer(type_indices, dtype=np.int64)
+    rows = np.frombuffer(rows, dtype=np.int64)
+    columns = np.frombuffer(columns, dtype=np.int64)
+    # The number of IO cells needed to carry the bandwidth of each net.
+    values = np.ceil(np.frombuffer(bandwidths, dtype=float)/np.array(io_bandwidths, dtype=float)[type_indices])
+
+    # Bidirectional nets also connect block1 to block0.
+    bidirectional = np.array(io_bidirectional, dtype=bool)[type_indices]
+    type_indices = np.concatenate((type_indices, type_indices[bidirectional]))
+    rows, columns = np.concatenate((rows, columns[bidirectional])), np.concatenate((columns, rows[bidirectional]))
+    values = np.concatenate((values, values[bidirectional]))
+
+    return net_types, type_indices, rows, columns, values, block_names
+
+# Define a function to build one adjacency matrix per net type from the edge arrays.
+# Repeated edges between the same blocks are summed.
+def adjacencyMatricesFromEdges(net_types, type_indices, rows, columns, values, num_blocks, sparse=False):
+    if sparse and d.sparse is None:
+        print("ERROR: Sparse adjacency matrices require scipy, which is not installed.")
+        sys.exit(1)
+
+    # The output format is a dictionary of items with format {type: adjacencey matrix}
+    global_adjacency_matrix = {}
+    for type_index in range(len(net_types)):
+        selected = type_indices == type_index
+        if sparse:
+            global_adjacency_matrix[net_types[type_index]] = d.sparse.coo_matrix((values[selected], (rows[selected], columns[selected])), shape=(num_blocks,num_blocks)).tocsr()
         else:
-            global_adjacency_matrix[net_def.attrib["type"]][block1_index,block2_index] += int(math.ceil(float(net_def.attrib["bandwidth"])/io_bandwidth))
-            global_adjacency_matrix[net_def.attrib["type"]][block2_index,block1_index] += int(math.ceil(float(net_def.attrib["bandwidth"])/io_bandwidth))
+            matrix = np.zeros((num_blocks,num_blocks))
+            np.add.at(matrix, (rows[selected], columns[selected]), values[selected])
+            global_adjacency_matrix[net_types[type_index]] = matrix
 
-    return global_adjacency_matrix, block_names
+    return global_adjacency_matrix
 
 # Define a function to construct the root chip and all subchips from a definition file.
 def chipFromDict(dict, io_list, layer_list, wafer_process_list, assembly_process_list, test_process_list, global_adjacency_matrix, block_names):
@@ -0,0 +1,52 @@
+# ==============================================================================
+# = This file contains the closed form reticle utilization and stitching model. =
+# ==============================================================================
+
+# All functions accept either a single die area or an array of die areas in mm^2 and return values of the same shape.
+# A die larger than the reticle is exposed as a stitched group of reticles. The reticles for a stitched die are
+#  arranged as the largest square grid that fits followed by a partial row or column for the remaining reticles.
+
+import numpy as np
+
+
+# Define a function to compute the number of reticles required to expose each die.
+def computeNumberReticles(areas, reticle_x, reticle_y):
+    areas = np.asarray(areas, dtype=float)
+    reticle_area = reticle_x*reticle_y
+    # Every die needs at least one reticle, even if the area is zero.
+    num_reticles = np.maximum(np.ceil(areas/reticle_area), 1).astype(np.int64)
+    return num_reticles
+
+# Define a function to compute the number of stitches between the reticles of each die.
+def computeNumberStitches(num_reticles):
+    num_reticles = np.asarray(num_reticles, dtype=np.int64)
+    # Side of the largest square grid of reticles that fits in the number of reticles.
+    largest_square_side = np.floor(np.sqrt(num_reticles)).astype(np.int64)
+    # Correct for floating point error in the square root of large perfect squares.
+    largest_square_side -= (largest_square_side*largest_square_side > num_reticles)
+    largest_square_side += ((largest_square_side + 1)*(largest_square_side + 1) <= num_reticles)
+    largest_square_num_reticles = largest_square_side**2
+    remaining_reticles = num_reticles - largest_square_num_reticles
+    # The square grid has 2*side*(side-1) internal edges. Each remaining reticle adds two stitches except the first one in each new row or column.
+    num_stitches = largest_square_side*(largest_square_side-1)*2 + 2*remaining_reticles - (-(-remaining_reticles//largest_square_side))
+    return num_stitches
+
+# Define a function to compute the reticle utilization of each die.
+def computeReticleUtilization(areas, reticle_x, reticle_y):
+    areas = np.asarray(areas, dtype=float)
+    # If the area is larger than the reticle area, this requires stitching. To get the reticle utilization,
+    #  increase the reticle area to the lowest multiple of the reticle area that will fit the stitched chip.
+    reticle_area = computeNumberReticles(areas, reticle_x, reticle_y)*(reticle_x*reticle_y)
+    number_chips_in_reticle = reticle_area//areas
+    unutilized_reticle = reticle_area - number_chips_in_reticle*areas
+    reticle_utilization = (reticle_area - unutilized_reticle)/reticle_area
+    return reticle_utilization
+
+# Define a function to compute the reticle utilization, number of reticles, and number of stitches for a wafer process.
+def computeReticleParameters(areas, wafer_process):
+    reticle_x = wafer_process.get_reticle_x()
+    reticle_y = wafer_process.get_reticle_y()
+    num_reticles = computeNumberReticles(areas, reticle_x, reticle_y)
+    num_stitches = computeNumberStitches(num_reticles)
+    reticle_utilization = computeReticleUtilization(areas, reticle_x, reticle_y)
+    return reticle_utilization, num_reticles, num_stitches
@@ -0,0 +1,84 @@
+# ==============================================================================
+# = This file places a compiled netlist in shared memory for worker processes. =
+# ==============================================================================
+
+# The adjacency tensor is the largest object in a design. Rather than pickling it to every worker process, the
+#  arrays of a Netlist and the block names are copied once into multiprocessing.shared_memory segments. A small
+#  handle describing the segments is sent to the workers, which attach to the segments and wrap them in read-only
+#  NumPy views, so every worker uses the same physical memory.
+# The process that creates the segments owns them and must call releaseSharedNetlist with unlink=True once all of
+#  the workers are done. Workers call releaseSharedNetlist with unlink=False when they no longer need the netlist.
+
+import numpy as np
+from multiprocessing import shared_memory
+import design as d
+
+
+# Define a function to copy an array into a new shared memory segment.
+def shareArray(array, segments):
+    array = np.ascontiguousarray(array)
+    # Shared memory segments can not be empty.
+    segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    segments.append(segment)
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)
+    view[...] = array
+    return {"name": segment.name, "shape": array.shape, "dtype": array.dtype.str}
+
+# Define a function to attach to a shared memory segment without taking ownership of it.
+def attachSegment(name):
+    try:
+        segment = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13, attaching also registers the segment with the resource tracker. Worker processes started by
+        #  multiprocessing share the resource tracker of the owner, so the registration is removed when the owner unlinks.
+        segment = shared_memory.SharedMemory(name=name)
+    return segment
+
+# Define a function to copy the arrays and block names of a netlist into shared memory.
+# Returns the handle to pass to attachSharedNetlist and the list of segments owned by the caller.
+def createSharedNetlist(netlist):
+    segments = []
+    handle = {"arrays": {}, "values": {}}
+    for key, value in netlist.get_arrays().items():
+        if isinstance(value, np.ndarray):
+            handle["arrays"][key] = shareArray(value, segments)
+        elif key != "block_names":
+            handle["values"][key] = value
+    # The block names are stored as one UTF-8 buffer with the offset of the end of each name.
+    encoded_names = [name.encode("utf-8") for name in netlist.get_block_names()]
+    handle["arrays"]["block_name_bytes"] = shareArray(np.frombuffer(b"".join(encoded_names), dtype=np.uint8), segments)
+    handle["arrays"]["block_name_offsets"] = shareArray(np.cumsum([len(name) for name in encoded_names], dtype=np.int64), segments)
+    return handle, segments
+
+# Define a function to build a netlist from the shared memory segments of a handle.
+# Returns the netlist and the list of attached segments, which must be kept alive as long as the netlist is used.
+def attachSharedNetlist(handle):
+    segments = []
+    arrays = dict(handle["values"])
+    for key, description in handle["arrays"].items():
+        segment = attachSegment(description["name"])
+        segments.append(segment)
+        view = np.ndarray(description["shape"], dtype=np.dtype(description["dtype"]), buffer=segment.buf)
+        view.flags.writeable = False
+        arrays[key] = view
+    name_bytes = arrays.pop("block_name_bytes").tobytes()
+    name_offsets = arrays.pop("block_name_offsets")
+    block_names = []
+    start = 0
+    for end in name_offsets:
+        block_names.append(name_bytes[start:end].decode("utf-8"))
+        start = end
+    arrays["block_names"] = block_names
+    netlist = d.Netlist()
+    if netlist.set_arrays(arrays) != 0:
+        releaseSharedNetlist(segments)
+        return None, []
+    return netlist, segments
+
+# Define a function to close the shared memory segments of a netlist. The owner also unlinks the segments.
+def releaseSharedNetlist(segments, unlink=False):
+    for segment in segments:
+        segment.close()
+        if unlink:
+            segment.unlink()
+    return
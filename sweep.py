@@ -0,0 +1,443 @@
+# ==============================================================================
+# = This file contains the vectorized parameter sweep for a chip definition.   =
+# ==============================================================================
+
+# A sweep evaluates the area, cost, and yield of a chip for many values of its parameters without rebuilding the chip.
+# Parameters are given as tuples of (parameter, target, values). The parameters and their targets are listed in
+#  sweep_parameters. A target is the name of a chip, layer, assembly process, or wafer process, or None to apply the
+#  values to every object of that kind. The values of all parameters are broadcast against each other through the
+#  area, yield, and cost formulas, so the results are arrays with the broadcast shape of the values.
+# Layer, assembly process, and wafer process parameters are applied to copies of the library objects that hold
+#  arrays in place of the given values, so the formulas of the Stackup and Assembly classes are used unchanged. The
+#  copies are not static, so none of their results are kept in the computation cache.
+# The netlist does not depend on any of the parameters, so the IO area and signal counts of each chip are read once
+#  from the chip and shared by every point of the sweep.
+# sweepDesign places the values of each axis on its own dimension to evaluate a grid of parameter values.
+# Design variants that can not be expressed as a grid, such as different chip definition files, are evaluated by
+#  parallelSweep on a pool of worker processes that share the libraries and the compiled netlist. The netlist is
+#  shared through fork copy-on-write memory, or through shared memory segments when shared_memory is set.
+
+import sys
+import copy
+import multiprocessing
+import numpy as np
+import design as d
+import reticle
+import shared_netlist
+
+# Dictionary from parameter name to the kind of object it belongs to and the attribute that holds it.
+sweep_parameters = {
+    "coreArea": ("chip", "coreArea"),
+    "quantity": ("chip", "quantity"),
+    "nre_design_cost": ("chip", "nre_design_cost"),
+    "defect_density": ("layer", "defect_density"),
+    "critical_area_ratio": ("layer", "critical_area_ratio"),
+    "clustering_factor": ("layer", "clustering_factor"),
+    "cost_per_mm2": ("layer", "cost_per_mm2"),
+    "litho_percent": ("layer", "litho_percent"),
+    "mask_cost": ("layer", "mask_cost"),
+    "stitching_yield": ("layer", "stitching_yield"),
+    "bonding_pitch": ("assembly", "bonding_pitch"),
+    "die_separation": ("assembly", "die_separation"),
+    "alignment_yield": ("assembly", "alignment_yield"),
+    "bonding_yield": ("assembly", "bonding_yield"),
+    "dielectric_bond_defect_density": ("assembly", "dielectric_bond_defect_density"),
+    "picknplace_machine_cost": ("assembly", "picknplace_machine_cost"),
+    "picknplace_machine_lifetime": ("assembly", "picknplace_machine_lifetime"),
+    "picknplace_machine_uptime": ("assembly", "picknplace_machine_uptime"),
+    "picknplace_technician_yearly_cost": ("assembly", "picknplace_technician_yearly_cost"),
+    "picknplace_time": ("assembly", "picknplace_time"),
+    "bonding_machine_cost": ("assembly", "bonding_machine_cost"),
+    "bonding_machine_lifetime": ("assembly", "bonding_machine_lifetime"),
+    "bonding_machine_uptime": ("assembly", "bonding_machine_uptime"),
+    "bonding_technician_yearly_cost": ("assembly", "bonding_machine_technician_yearly_cost"),
+    "bonding_time": ("assembly", "bonding_time"),
+    "wafer_process_yield": ("wafer_process", "wafer_process_yield")
+}
+
+
+# Define a function to check that a parameter can be swept.
+def checkParameter(parameter):
+    if parameter not in sweep_parameters:
+        print("Error: Invalid sweep parameter " + str(parameter) + ". Must be one of " + str(list(sweep_parameters.keys())) + ". Exiting...")
+        sys.exit(1)
+    return
+
+# Define a function to check that every (parameter, target, distribution, arguments) tuple names a parameter that can
+#  be swept and a numpy.random.Generator method to draw it from.
+def checkDistributions(distributions):
+    for parameter, target, distribution, arguments in distributions:
+        checkParameter(parameter)
+        if not hasattr(np.random.Generator, distribution):
+            print("Error: Invalid distribution " + str(distribution) + " for parameter " + str(parameter) + ". Exiting...")
+            sys.exit(1)
+    return
+
+# Define a function to get the value of a chip parameter for the chip with the name given.
+# The value of the last matching parameter is used. If no parameter matches, the default value is returned.
+def parameterValue(parameters, parameter, name, default):
+    value = default
+    for i in range(len(parameters)):
+        if parameters[i][0] == parameter and (parameters[i][1] == None or parameters[i][1] == name):
+            value = parameters[i][2]
+    return value
+
+# Define a function to get a copy of a library object with the parameter values applied.
+# The object itself is returned if no parameter applies to it. Copies are kept in the copies dictionary so each
+#  library object is copied once per evaluation.
+def sampledObject(library_object, kind, parameters, copies):
+    if id(library_object) in copies:
+        return copies[id(library_object)]
+    sampled_object = library_object
+    for parameter, target, values in parameters:
+        object_kind, attribute = sweep_parameters[parameter]
+        if object_kind == kind and (target == None or target == library_object.get_name()):
+            if sampled_object is library_object:
+                sampled_object = copy.copy(library_object)
+                # The copy holds the values of this evaluation, so its results must not be cached.
+                sampled_object.static = False
+            setattr(sampled_object, attribute, values)
+    # The machine cost per second of an assembly process is derived from its other parameters.
+    if kind == "assembly" and sampled_object is not library_object:
+        sampled_object.compute_picknplace_cost_per_second()
+        sampled_object.compute_bonding_cost_per_second()
+    copies[id(library_object)] = sampled_object
+    return sampled_object
+
+# Define a function to compute the area, cost, and yield of a chip and its stacked chips for the parameter values.
+def evaluateChip(chip, parameters, copies):
+    stacked_results = [evaluateChip(stacked_chip, parameters, copies) for stacked_chip in chip.get_chips()]
+
+    assembly_process = sampledObject(chip.get_assemblyProcess(), "assembly", parameters, copies)
+    wafer_process = sampledObject(chip.get_waferProcess(), "wafer_process", parameters, copies)
+    layers = [sampledObject(layer, "layer", parameters, copies) for layer in chip.get_stackup()]
+    if all(layers[i] is chip.get_stackup()[i] for i in range(len(layers))):
+        stackup = chip.get_stackupArrays()
+    else:
+        stackup = d.Stackup(layers, check_static=False)
+    core_area = parameterValue(parameters, "coreArea", chip.get_name(), chip.get_coreArea())
+    quantity = parameterValue(parameters, "quantity", chip.get_name(), chip.get_quantity())
+    nre_design_cost = parameterValue(parameters, "nre_design_cost", chip.get_name(), chip.get_nre_design_cost())
+
+    stacked_areas = []
+    for i in range(len(stacked_results)):
+        if not chip.get_chips()[i].get_buried():
+            stacked_areas.append(stacked_results[i][0])
+    stacked_costs = [stacked_cost/stacked_yield for stacked_area, stacked_cost, stacked_yield in stacked_results]
+    return evaluateNode(chip, stacked_areas, stacked_costs, assembly_process, wafer_process, stackup, core_area, quantity, nre_design_cost)
+
+# Define a function to compute the area, cost, and yield of a chip given the areas of its stacked chips that are not
+#  buried and the costs divided by the yields of all of its stacked chips, along with the processes, stackup, and chip
+#  parameters to use. Any of these may be arrays, which broadcast against each other. The quality yield of the stacked
+#  chips is taken from the test processes set on them unless it is given.
+# This follows Chip.computeArea, Chip.computeChipYield, and Chip.computeCost.
+def evaluateNode(chip, stacked_areas, stacked_costs, assembly_process, wafer_process, stackup, core_area, quantity, nre_design_cost, quality_yield=None):
+    # Area
+    stacked_die_area = 0.0
+    for stacked_area in stacked_areas:
+        stacked_die_area = stacked_die_area + stacked_area
+    if chip.get_block_index() == None:
+        pad_required_area = 0.0
+    else:
+        signal_pads, signal_with_reach_count = chip.get_chip_signal_count()
+        pad_required_area = d.pad_area(chip.get_netlist().get_reach_values(), signal_with_reach_count, assembly_process.get_bonding_pitch(), assembly_process.get_die_separation())
+    chip_io_area = core_area + chip.get_ioArea()
+    area = np.maximum(np.maximum(stacked_die_area, pad_required_area), chip_io_area)
+
+    # Yield
+    num_reticles = reticle.computeNumberReticles(area, wafer_process.get_reticle_x(), wafer_process.get_reticle_y())
+    num_stitches = reticle.computeNumberStitches(num_reticles)
+    chip_yield = stackup.stackupYield(chip_io_area, num_stitches)
+    if quality_yield is None:
+        quality_yield = chip.qualityYield()
+    assembly_yield = assembly_process.assembly_yield(chip.get_chips_len(), chip.get_chips_signal_count(), stacked_die_area)
+    chip_yield = chip_yield*(quality_yield*assembly_yield*wafer_process.get_wafer_process_yield())
+
+    # Cost
+    cost = stackup.stackupCost(area, wafer_process)
+    for stacked_cost in stacked_costs:
+        cost = cost + stacked_cost
+    cost = cost + assembly_process.assembly_cost(chip.get_chips_len(), chip.get_chips_signal_count(), stacked_die_area)
+    cost = cost + (nre_design_cost + stackup.stackupMaskCost())/quantity
+
+    return area, cost, chip_yield
+
+# Define a function to compute the area, cost, and yield of a chip for a list of (parameter, target, values) tuples.
+# Returns a dictionary of arrays of area, cost, and yield with the broadcast shape of the values.
+def evaluateDesign(chip, parameters):
+    shape = ()
+    for parameter, target, values in parameters:
+        checkParameter(parameter)
+        shape = np.broadcast_shapes(shape, np.shape(values))
+    parameters = [(parameter, target, np.asarray(values, dtype=float)) for parameter, target, values in parameters]
+    area, cost, chip_yield = evaluateChip(chip, parameters, {})
+    results = {
+        "area": np.broadcast_to(area, shape).copy(),
+        "cost": np.broadcast_to(cost, shape).copy(),
+        "yield": np.broadcast_to(chip_yield, shape).copy()
+    }
+    return results
+
+# Define a function to sweep a chip that has already been built over a grid of parameter values.
+# Each axis is a (parameter, target, values) tuple with a one dimensional list of values.
+# Returns a dictionary of arrays of area, cost, and yield with one dimension per axis in the order the axes are given.
+def sweepDesign(chip, axes):
+    parameters = []
+    for i in range(len(axes)):
+        parameter, target, values = axes[i]
+        checkParameter(parameter)
+        values = np.asarray(values, dtype=float)
+        if values.ndim != 1:
+            print("Error: Values for sweep parameter " + str(parameter) + " must be a one dimensional list. Exiting...")
+            sys.exit(1)
+        shape = [1]*len(axes)
+        shape[i] = len(values)
+        parameters.append((parameter, target, values.reshape(shape)))
+    results = evaluateDesign(chip, parameters)
+    shape = tuple(len(axes[i][2]) for i in range(len(axes)))
+    for key in results:
+        results[key] = np.broadcast_to(results[key], shape).copy()
+    return results
+
+# Define a function to build a chip from the parsed libraries, netlist, and chip definition file once and sweep it.
+def sweepDesignFromFile(chip_file, io_list, layer_list, wafer_process_list, assembly_process_list, test_process_list, adjacency_matrix_definitions, block_names, axes):
+    chip = d.Chip(filename=chip_file, dict={}, waferProcessList=wafer_process_list, assemblyProcessList=assembly_process_list, testProcessList=test_process_list, layers=layer_list, ios=io_list, adjacency_matrix_definitions=adjacency_matrix_definitions, block_names=block_names, static=False)
+    return sweepDesign(chip, axes)
+
+# Define a function to estimate the distribution of the cost and yield of a chip by Monte Carlo sampling.
+# Each distribution is a tuple of (parameter, target, distribution, arguments) where distribution is the name of a
+#  numpy.random.Generator method and arguments are its arguments before size, for example
+#  ("defect_density", "5nm_active", "normal", (0.0007, 0.0001)).
+# Samples are drawn and evaluated in chunks of chunk_size to bound the size of the intermediate arrays. Each
+#  parameter has its own random stream spawned from the seed, so the samples do not depend on the chunk size.
+# Returns a dictionary with the requested percentiles and the mean of the area, cost, and yield of the chip.
+def monteCarlo(chip, distributions, num_samples, seed=None, chunk_size=65536, percentiles=[5, 50, 95]):
+    checkDistributions(distributions)
+    generators = [np.random.default_rng(seed_sequence) for seed_sequence in np.random.SeedSequence(seed).spawn(len(distributions))]
+
+    samples = {"area": np.empty(num_samples), "cost": np.empty(num_samples), "yield": np.empty(num_samples)}
+    for start in range(0, num_samples, chunk_size):
+        size = min(chunk_size, num_samples - start)
+        parameters = []
+        for i in range(len(distributions)):
+            parameter, target, distribution, arguments = distributions[i]
+            values = getattr(generators[i], distribution)(*arguments, size=size)
+            parameters.append((parameter, target, values))
+        results = evaluateDesign(chip, parameters)
+        for key in samples:
+            samples[key][start:start + size] = np.broadcast_to(results[key], (size,))
+
+    results = {"percentiles": np.asarray(percentiles, dtype=float)}
+    for key in samples:
+        results[key] = np.percentile(samples[key], percentiles)
+        results[key + "_mean"] = np.mean(samples[key])
+    return results
+
+# Libraries shared with the worker processes of parallelSweep.
+# With the fork start method the workers inherit these from the parent process without copying or pickling them.
+sweep_libraries = None
+# Shared memory segments backing the netlist of a worker. These are kept here so the segments stay open.
+sweep_segments = []
+
+# Define a function to set the libraries used by sweepVariant. This is also the initializer for workers that are not forked.
+# If the libraries hold a shared netlist handle instead of a netlist, the worker attaches to the shared memory segments.
+def setSweepLibraries(libraries):
+    global sweep_libraries, sweep_segments
+    if "shared_netlist" in libraries:
+        netlist, sweep_segments = shared_netlist.attachSharedNetlist(libraries["shared_netlist"])
+        if netlist == None:
+            # A worker that exits during initialization is replaced by the pool and the replacement fails the same way,
+            #  so the error is raised when a variant is evaluated and reaches the caller of parallelSweep.
+            print("Error: Could not attach the shared netlist.")
+            sweep_libraries = None
+            return
+        libraries = dict(libraries)
+        libraries["netlist"] = netlist
+        libraries["block_names"] = netlist.get_block_names()
+    sweep_libraries = libraries
+    return
+
+# Define a function to evaluate one design variant with the shared libraries.
+# A variant is a tuple of (chip_file, overrides) where overrides is a list of (parameter, target, value) tuples
+#  using the same parameters and targets as the sweep axes.
+def sweepVariant(variant):
+    chip_file, overrides = variant
+    if sweep_libraries == None:
+        raise RuntimeError("Sweep libraries are not available in this process. The shared netlist could not be attached.")
+    chip = d.Chip(filename=chip_file, dict={}, waferProcessList=sweep_libraries["wafer_process_list"], assemblyProcessList=sweep_libraries["assembly_process_list"], testProcessList=sweep_libraries["test_process_list"], layers=sweep_libraries["layer_list"], ios=sweep_libraries["io_list"], adjacency_matrix_definitions=sweep_libraries["adjacency_matrix_definitions"], block_names=sweep_libraries["block_names"], static=False, netlist=sweep_libraries["netlist"])
+    axes = [(parameter, target, [value]) for parameter, target, value in overrides]
+    results = sweepDesign(chip, axes)
+    for key in results:
+        results[key] = float(results[key].reshape(-1)[0])
+    return results
+
+# Define a function to evaluate a list of design variants on a pool of worker processes.
+# The libraries and netlist are loaded once by the caller and the netlist is compiled once here, then shared with the workers.
+# If shared_memory is set, the compiled netlist is placed in shared memory segments and the workers attach to read-only
+#  views of them instead of inheriting or unpickling the netlist.
+# Returns a list of dictionaries of area, cost, and yield in the same order as the variants.
+def parallelSweep(variants, io_list, layer_list, wafer_process_list, assembly_process_list, test_process_list, adjacency_matrix_definitions, block_names, processes=None, chunksize=1, shared_memory=False):
+    libraries = {
+        "io_list": io_list,
+        "layer_list": layer_list,
+        "wafer_process_list": wafer_process_list,
+        "assembly_process_list": assembly_process_list,
+        "test_process_list": test_process_list,
+        # Chips are built around the compiled netlist, so the adjacency matrix definitions are not passed to the workers.
+        "adjacency_matrix_definitions": {},
+        "block_names": block_names,
+        "netlist": d.Netlist(adjacency_matrix_definitions, io_list, block_names)
+    }
+    variants = list(variants)
+    if processes == 1 or len(variants) <= 1:
+        setSweepLibraries(libraries)
+        return [sweepVariant(variant) for variant in variants]
+
+    if shared_memory:
+        handle, segments = shared_netlist.createSharedNetlist(libraries["netlist"])
+        worker_libraries = dict(libraries)
+        worker_libraries["block_names"] = []
+        worker_libraries["netlist"] = None
+        worker_libraries["shared_netlist"] = handle
+        try:
+            with multiprocessing.get_context().Pool(processes=processes, initializer=setSweepLibraries, initargs=(worker_libraries,)) as pool:
+                results = pool.map(sweepVariant, variants, chunksize=chunksize)
+        finally:
+            shared_netlist.releaseSharedNetlist(segments, unlink=True)
+        return results
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        # Forked workers see the libraries through copy-on-write memory.
+        setSweepLibraries(libraries)
+        context = multiprocessing.get_context("fork")
+        pool = context.Pool(processes=processes)
+    else:
+        # Other start methods pickle the libraries once per worker instead of once per variant.
+        context = multiprocessing.get_context()
+        pool = context.Pool(processes=processes, initializer=setSweepLibraries, initargs=(libraries,))
+    with pool:
+        results = pool.map(sweepVariant, variants, chunksize=chunksize)
+    return results
+
+
+# Define a function to find the library objects used by a chip and its stacked chips.
+# Returns a dictionary from object kind to a dictionary from object name to the object.
+def libraryObjects(chip, objects=None):
+    if objects == None:
+        objects = {"chip": {}, "layer": {}, "assembly": {}, "wafer_process": {}}
+    objects["chip"][chip.get_name()] = chip
+    for layer in chip.get_stackup():
+        objects["layer"][layer.get_name()] = layer
+    objects["assembly"][chip.get_assemblyProcess().get_name()] = chip.get_assemblyProcess()
+    objects["wafer_process"][chip.get_waferProcess().get_name()] = chip.get_waferProcess()
+    for stacked_chip in chip.get_chips():
+        libraryObjects(stacked_chip, objects)
+    return objects
+
+# Define a function to list every layer, assembly process, and wafer process parameter used by a chip as (parameter, target) tuples.
+def libraryParameters(chip):
+    objects = libraryObjects(chip)
+    parameters = []
+    for kind in ["layer", "assembly", "wafer_process"]:
+        for name in objects[kind]:
+            for parameter in sweep_parameters:
+                if sweep_parameters[parameter][0] == kind:
+                    parameters.append((parameter, name))
+    return parameters
+
+# Define a function to compute the derivatives of the area, cost, and yield of a chip with respect to its parameters.
+# Parameters are given as (parameter, target) tuples and default to every library parameter used by the chip.
+# The derivatives are central finite differences with a step of relative_step times the parameter value, or
+#  relative_step if the value is zero. Both perturbations of every parameter are placed along one axis and
+#  evaluated together in a single vectorized evaluation of the chip.
+# Functions of the area that round to a whole number of dies, reticles, or pads are piecewise constant, so their
+#  contribution is only captured when a step crosses a boundary.
+# Returns a dictionary with the parameters, their values, and arrays of the derivatives of area, cost, and yield.
+def sensitivity(chip, parameters=None, relative_step=1e-6):
+    if parameters == None:
+        parameters = libraryParameters(chip)
+    objects = libraryObjects(chip)
+    values = np.zeros(len(parameters))
+    for i in range(len(parameters)):
+        parameter, target = parameters[i]
+        checkParameter(parameter)
+        kind, attribute = sweep_parameters[parameter]
+        if target not in objects[kind]:
+            print("Error: No " + kind + " named " + str(target) + " is used by chip " + chip.get_name() + ". Exiting...")
+            sys.exit(1)
+        values[i] = getattr(objects[kind][target], attribute)
+    steps = np.where(values != 0.0, relative_step*np.abs(values), relative_step)
+
+    # Entry 2*i of the batch raises parameter i by its step and entry 2*i+1 lowers it. All other entries use the parameter value.
+    batch_parameters = []
+    for i in range(len(parameters)):
+        batch_values = np.full(2*len(parameters), values[i])
+        batch_values[2*i] += steps[i]
+        batch_values[2*i + 1] -= steps[i]
+        batch_parameters.append((parameters[i][0], parameters[i][1], batch_values))
+    results = evaluateDesign(chip, batch_parameters)
+
+    derivatives = {"parameters": list(parameters), "values": values}
+    for key in ["area", "cost", "yield"]:
+        batch_results = np.broadcast_to(results[key], (2*len(parameters),)).reshape(len(parameters), 2)
+        derivatives[key] = (batch_results[:, 0] - batch_results[:, 1])/(2*steps)
+    return derivatives
+
+# Define a function to compute variance based global sensitivity indices of the cost and yield of a chip.
+# Distributions use the same (parameter, target, distribution, arguments) format as monteCarlo.
+# This uses the Saltelli sampling scheme. Two independent sample matrices A and B of num_samples rows are drawn,
+#  and for every parameter i a matrix AB_i is formed from A with column i taken from B. The chip is evaluated for
+#  the rows of A, B, and every AB_i, which is num_samples*(parameters + 2) evaluations in total. The rows of all the
+#  matrices for a chunk of samples are placed along one axis and evaluated together.
+# The first order indices use the Saltelli (2010) estimator and the total indices use the Jansen estimator. The
+#  first order estimator is centered on the mean of the results for A and B, which removes the noise that a large
+#  mean adds when the results vary little, as the yield often does.
+# Returns a dictionary with the parameters and arrays of the first order and total indices of the cost and yield.
+def sobolIndices(chip, distributions, num_samples, seed=None, chunk_size=4096):
+    checkDistributions(distributions)
+    num_parameters = len(distributions)
+    # Each parameter has one random stream for A and one for B so the samples do not depend on the chunk size.
+    seed_sequences = np.random.SeedSequence(seed).spawn(2*num_parameters)
+    generators_a = [np.random.default_rng(seed_sequence) for seed_sequence in seed_sequences[:num_parameters]]
+    generators_b = [np.random.default_rng(seed_sequence) for seed_sequence in seed_sequences[num_parameters:]]
+
+    keys = ["cost", "yield"]
+    samples_a = {key: np.empty(num_samples) for key in keys}
+    samples_b = {key: np.empty(num_samples) for key in keys}
+    first_order_sums = {key: np.zeros(num_parameters) for key in keys}
+    difference_sums = {key: np.zeros(num_parameters) for key in keys}
+    total_sums = {key: np.zeros(num_parameters) for key in keys}
+    for start in range(0, num_samples, chunk_size):
+        size = min(chunk_size, num_samples - start)
+        parameters = []
+        for i in range(num_parameters):
+            parameter, target, distribution, arguments = distributions[i]
+            values_a = getattr(generators_a[i], distribution)(*arguments, size=size)
+            values_b = getattr(generators_b[i], distribution)(*arguments, size=size)
+            # The batch holds the rows of A, then B, then AB_j for every parameter j.
+            batch_values = np.concatenate([values_a, values_b] + [values_b if j == i else values_a for j in range(num_parameters)])
+            parameters.append((parameter, target, batch_values))
+        results = evaluateDesign(chip, parameters)
+        for key in keys:
+            batch_results = np.broadcast_to(results[key], ((num_parameters + 2)*size,)).reshape(num_parameters + 2, size)
+            result_a = batch_results[0]
+            result_b = batch_results[1]
+            result_ab = batch_results[2:]
+            samples_a[key][start:start + size] = result_a
+            samples_b[key][start:start + size] = result_b
+            first_order_sums[key] += np.sum(result_b*(result_ab - result_a), axis=1)
+            difference_sums[key] += np.sum(result_ab - result_a, axis=1)
+            total_sums[key] += np.sum((result_a - result_ab)**2, axis=1)
+
+    indices = {"parameters": [(parameter, target) for parameter, target, distribution, arguments in distributions], "num_evaluations": num_samples*(num_parameters + 2)}
+    for key in keys:
+        results = np.concatenate([samples_a[key], samples_b[key]])
+        mean = np.mean(results)
+        variance = np.var(results)
+        if variance == 0.0:
+            indices[key + "_first_order"] = np.zeros(num_parameters)
+            indices[key + "_total"] = np.zeros(num_parameters)
+            continue
+        indices[key + "_first_order"] = (first_order_sums[key] - mean*difference_sums[key])/num_samples/variance
+        indices[key + "_total"] = total_sums[key]/(2*num_samples)/variance
+    return indices
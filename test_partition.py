@@ -0,0 +1,98 @@
+# ==============================================================================
+# = Regression checks for the chiplet partitioner and block clustering.        =
+# ==============================================================================
+
+import numpy as np
+import pytest
+import design as d
+import readDesignFromFile as readDesign
+import partition
+
+
+# Define a function to build a sparse chain netlist where block i connects to block i+1.
+# The test is skipped if scipy, which is optional, is not installed.
+def chainNetlist(num_blocks):
+    sparse = pytest.importorskip("scipy.sparse")
+    ios = readDesign.ioDefinitionListFromFile("io_definitions.xml")
+    sources = np.arange(num_blocks - 1)
+    adjacency_matrix_definitions = {ios[0].get_type(): sparse.csr_matrix((np.ones(num_blocks - 1), (sources, sources + 1)), shape=(num_blocks, num_blocks))}
+    return d.Netlist(adjacency_matrix_definitions, ios, ["b" + str(i) for i in range(num_blocks)])
+
+# Define a function to find the deepest block in the union-find forest of a BlockClusters.
+def forestDepth(clusters):
+    depth = 0
+    for block in range(len(clusters.parent)):
+        block_depth = 0
+        while clusters.parent[block] != block:
+            block = clusters.parent[block]
+            block_depth += 1
+        depth = max(depth, block_depth)
+    return depth
+
+def test_merge_depth_is_logarithmic():
+    num_blocks = 4096
+    clusters = partition.BlockClusters(chainNetlist(num_blocks))
+    # Merging along the chain grows one group a block at a time, which builds a chain of roots without union by size.
+    for block in range(1, num_blocks):
+        assert clusters.mergeBlocks(block - 1, block) == 0
+    assert clusters.get_num_groups() == 1
+    assert clusters.size[clusters.get_group(0)] == num_blocks
+    assert forestDepth(clusters) <= np.log2(num_blocks)
+    assert clusters.get_io_area(0) == 0.0
+    while len(clusters.history) > 0:
+        clusters.unmergeBlocks()
+    assert clusters.get_num_groups() == num_blocks
+    assert np.array_equal(clusters.parent, np.arange(num_blocks))
+    assert np.all(clusters.size == 1)
+    assert set(clusters.get_group_neighbors(1)) == {0, 2}
+
+def test_single_block_chiplet_matches_chip_cost():
+    ios = readDesign.ioDefinitionListFromFile("io_definitions.xml")
+    layers = readDesign.layerDefinitionListFromFile("layer_definitions.xml")
+    wafer_processes = readDesign.waferProcessDefinitionListFromFile("wafer_process_definitions.xml")
+    assembly_processes = readDesign.assemblyProcessDefinitionListFromFile("assembly_process_definitions.xml")
+    test_processes = readDesign.testProcessDefinitionListFromFile("test_definitions.xml")
+    adjacency_matrix_definitions, block_names = readDesign.globalAdjacencyMatrixFromFile("netlist.xml", ios)
+    system = d.Chip(filename="sip.xml", dict={}, waferProcessList=wafer_processes, assemblyProcessList=assembly_processes, testProcessList=test_processes, layers=layers, ios=ios, adjacency_matrix_definitions=adjacency_matrix_definitions, block_names=block_names, static=False)
+    netlist = system.get_netlist()
+    chips = [system]
+    for chip in chips:
+        chips.extend(chip.get_chips())
+    leaf_chips = [chip for chip in chips if chip.get_chips_len() == 0]
+    assert len(leaf_chips) > 0
+    for chip in leaf_chips:
+        index = netlist.get_block_index(chip.get_name())
+        block_areas = np.ones(netlist.get_num_blocks())
+        block_areas[index] = chip.get_coreArea()
+        # Every block is in a chiplet of its own.
+        chiplets = partition.Partition(netlist, block_areas, chip, assignments=np.arange(netlist.get_num_blocks()))
+        assert np.isclose(chiplets.get_io_area(index), chip.get_ioArea())
+        assert np.isclose(chiplets.get_chiplet_cost(index), chip.get_cost()/chip.get_chip_yield())
+
+def test_group_io_area_matches_netlist():
+    ios = readDesign.ioDefinitionListFromFile("io_definitions.xml")
+    adjacency_matrix_definitions, block_names = readDesign.globalAdjacencyMatrixFromFile("netlist.xml", ios)
+    netlist = d.Netlist(adjacency_matrix_definitions, ios, block_names)
+    clusters = partition.BlockClusters(netlist)
+    for block in range(netlist.get_num_blocks()):
+        assert np.isclose(clusters.get_io_area(block), netlist.get_io_area(block))
+    assert clusters.mergeBlocks(0, 1) == 0
+    assert clusters.unmergeBlocks() == 0
+    for block in range(netlist.get_num_blocks()):
+        assert np.isclose(clusters.get_io_area(block), netlist.get_io_area(block))
+
+def test_gain_buckets_walk_keys_in_decreasing_order():
+    buckets = partition.GainBuckets(gain_scale=1.0)
+    for block, gain in enumerate([3.0, 1.0, 5.0, 1.0, -2.0]):
+        buckets.insert(block, gain)
+    assert buckets.best(lambda block: True) == 2
+    # Emptying the top bucket leaves its key in the heap until it is passed over.
+    assert buckets.remove(2) == 5.0
+    assert buckets.best(lambda block: True) == 0
+    assert buckets.best(lambda block: block not in [0, 1]) == 3
+    buckets.update(4, 10.0)
+    assert buckets.best(lambda block: True) == 4
+    assert buckets.best(lambda block: block == 1) == 1
+    assert buckets.best(lambda block: False) == None
+    buckets.insert(2, 5.0)
+    assert buckets.best(lambda block: block != 4) == 2
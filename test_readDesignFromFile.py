@@ -0,0 +1,24 @@
+# ==============================================================================
+# = Regression checks for reading design files and the netlist cache.          =
+# ==============================================================================
+
+import os
+import stat
+import numpy as np
+import readDesignFromFile as readDesign
+
+
+def test_netlist_cache_entry_follows_umask(tmp_path):
+    ios = readDesign.ioDefinitionListFromFile("io_definitions.xml")
+    umask = os.umask(0o022)
+    try:
+        adjacency_matrix_definitions, block_names = readDesign.globalAdjacencyMatrixFromFile("netlist.xml", ios, cache_dir=str(tmp_path))
+    finally:
+        os.umask(umask)
+    entries = os.listdir(tmp_path)
+    assert len(entries) == 1
+    assert stat.S_IMODE(os.stat(os.path.join(tmp_path, entries[0])).st_mode) == 0o755
+    cached_matrix_definitions, cached_block_names = readDesign.globalAdjacencyMatrixFromFile("netlist.xml", ios, cache_dir=str(tmp_path))
+    assert cached_block_names == block_names
+    for io_type in adjacency_matrix_definitions:
+        assert np.array_equal(cached_matrix_definitions[io_type], adjacency_matrix_definitions[io_type])
@@ -0,0 +1,57 @@
+# ==============================================================================
+# = Regression checks for the vectorized sweeps and sampling analyses.         =
+# ==============================================================================
+
+import copy
+import design as d
+import readDesignFromFile as readDesign
+import sweep
+
+
+# Define a function to build the example system in package.
+def exampleChip():
+    ios = readDesign.ioDefinitionListFromFile("io_definitions.xml")
+    layers = readDesign.layerDefinitionListFromFile("layer_definitions.xml")
+    wafer_processes = readDesign.waferProcessDefinitionListFromFile("wafer_process_definitions.xml")
+    assembly_processes = readDesign.assemblyProcessDefinitionListFromFile("assembly_process_definitions.xml")
+    test_processes = readDesign.testProcessDefinitionListFromFile("test_definitions.xml")
+    adjacency_matrix_definitions, block_names = readDesign.globalAdjacencyMatrixFromFile("netlist.xml", ios)
+    return d.Chip(filename="sip.xml", dict={}, waferProcessList=wafer_processes, assemblyProcessList=assembly_processes, testProcessList=test_processes, layers=layers, ios=ios, adjacency_matrix_definitions=adjacency_matrix_definitions, block_names=block_names, static=False)
+
+uncertain_parameters = [("wafer_process_yield", None, "uniform", (0.9, 1.0)), ("defect_density", None, "normal", (0.0007, 0.0001))]
+
+def test_monte_carlo_cache_does_not_grow_with_chunks():
+    chip = exampleChip()
+    sweep.monteCarlo(chip, uncertain_parameters, 100, seed=1, chunk_size=100)
+    cache_size = d.computation_cache.get_size()
+    sweep.monteCarlo(chip, uncertain_parameters, 5000, seed=1, chunk_size=100)
+    assert d.computation_cache.get_size() == cache_size
+
+def test_sensitivity_cache_does_not_grow_with_calls():
+    chip = exampleChip()
+    # The area does not depend on the wafer process yield, so the perturbed wafer process copies see a scalar area.
+    parameters = [("wafer_process_yield", chip.get_waferProcess().get_name())]
+    sweep.sensitivity(chip, parameters)
+    cache_size = d.computation_cache.get_size()
+    for i in range(20):
+        sweep.sensitivity(chip, parameters)
+    assert d.computation_cache.get_size() == cache_size
+
+def test_sobol_cache_does_not_grow_with_chunks():
+    chip = exampleChip()
+    sweep.sobolIndices(chip, uncertain_parameters, 50, seed=1, chunk_size=50)
+    cache_size = d.computation_cache.get_size()
+    sweep.sobolIndices(chip, uncertain_parameters, 2000, seed=1, chunk_size=50)
+    assert d.computation_cache.get_size() == cache_size
+
+def test_chip_outside_netlist_has_no_pad_area():
+    chip = exampleChip()
+    assert chip.get_block_index() == None
+    # A die separation larger than the shortest reach is only an error for chips with signals.
+    assembly_process = copy.copy(chip.get_assemblyProcess())
+    assembly_process.static = False
+    assert assembly_process.set_die_separation(5.0) == 0
+    chip.assemblyProcess = assembly_process
+    assert chip.get_padArea() == 0.0
+    area, cost, chip_yield = sweep.evaluateNode(chip, [100.0], [0.0], assembly_process, chip.get_waferProcess(), chip.get_stackupArrays(), chip.get_coreArea(), chip.get_quantity(), chip.get_nre_design_cost())
+    assert area == max(100.0, chip.get_coreArea() + chip.get_ioArea())